@@ -0,0 +1,109 @@
+import argparse
+import gc
+import json
+import platform
+import sys
+import time
+import tracemalloc
+
+from minilang import Parser, Evaluator, Scanner
+from minilang_closure import ClosureEvaluator
+from minilang_vm import VM
+from benchmarks.workloads import WORKLOADS
+
+ENGINES = { "tree": Evaluator, "closure": ClosureEvaluator, "vm": VM }
+STAGES = ("scanner", "parser", "evaluator")
+MIN_SECONDS = 0.01
+MEMORY_SLACK = 1 << 16
+CALIBRATION_OPS = 200_000
+
+def measure(run, ops, repeat):
+    seconds = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        run()
+        seconds = min(seconds, time.perf_counter() - start)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        run()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally: tracemalloc.stop()
+    return { "ops": ops, "seconds": seconds, "ops_per_sec": ops / seconds, "peak_bytes": peak }
+
+def calibrate(repeat=3):
+    def work():
+        counts = {}
+        for i in range(CALIBRATION_OPS): counts[i & 255] = counts.get(i & 255, 0) + i
+
+    return measure(work, CALIBRATION_OPS, repeat)["ops_per_sec"]
+
+def run_workload(name, engine, scale=1.0, repeat=3):
+    source, ops = WORKLOADS[name](scale)
+    tokens = len(Scanner(source).values) - 1
+    ast = Parser(source).parse_program()
+
+    def evaluate():
+        evaluator = engine()
+        evaluator.eval_program(ast)
+        return evaluator.output
+
+    evaluate()
+    return {
+        "scanner": measure(lambda: Scanner(source), tokens, repeat),
+        "parser": measure(lambda: Parser(source).parse_program(), tokens, repeat),
+        "evaluator": measure(evaluate, ops, repeat),
+    }
+
+def run(engine="tree", scale=1.0, repeat=3, workloads=None, log=None):
+    results = {}
+    for name in workloads or WORKLOADS:
+        results[name] = run_workload(name, ENGINES[engine], scale, repeat)
+        if log is not None: print(format_workload(name, results[name]), file=log, flush=True)
+    return { "python": platform.python_version(), "engine": engine, "scale": scale, "calibration": calibrate(repeat),
+             "results": results }
+
+def compare(report, baseline, threshold):
+    assert (report["engine"], report["scale"]) == (baseline["engine"], baseline["scale"]), \
+           f"Baseline is for engine `{baseline['engine']}` at scale {baseline['scale']}."
+    assert "calibration" in baseline, "Baseline has no calibration; regenerate it with `--output`."
+    speed = report["calibration"] / baseline["calibration"]
+    regressions = []
+    for name, stages in report["results"].items():
+        for stage, result in stages.items():
+            if (base := baseline["results"].get(name, {}).get(stage)) is None: continue
+            expected = base["ops_per_sec"] * speed
+            if base["seconds"] >= MIN_SECONDS and result["ops_per_sec"] < expected * (1 - threshold):
+                regressions.append(f"{name}/{stage}: {result['ops_per_sec']:,.0f} ops/sec "
+                                   f"(baseline {expected:,.0f} after calibration)")
+            if result["peak_bytes"] > base["peak_bytes"] * (1 + threshold) + MEMORY_SLACK:
+                regressions.append(f"{name}/{stage}: peak {result['peak_bytes']:,} bytes "
+                                   f"(baseline {base['peak_bytes']:,})")
+    return regressions
+
+def format_workload(name, stages):
+    return "\n".join(f"{name:<18} {stage:<10} {stages[stage]['ops_per_sec']:>14,.0f} ops/sec "
+                     f"{stages[stage]['peak_bytes'] / (1 << 20):>10.2f} MiB peak" for stage in STAGES)
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    arg_parser.add_argument("--workload", action="append", choices=WORKLOADS, dest="workloads")
+    arg_parser.add_argument("--engine", choices=ENGINES, default="tree")
+    arg_parser.add_argument("--scale", type=float, default=1.0)
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    arg_parser.add_argument("--output", metavar="PATH")
+    arg_parser.add_argument("--baseline", metavar="PATH")
+    arg_parser.add_argument("--threshold", type=float, default=0.25)
+    args = arg_parser.parse_args(argv)
+
+    report = run(args.engine, args.scale, args.repeat, args.workloads, log=sys.stdout)
+    if args.output is not None:
+        with open(args.output, "w") as file: json.dump(report, file, indent=2)
+    if args.baseline is None: return 0
+    with open(args.baseline) as file: baseline = json.load(file)
+    if regressions := compare(report, baseline, args.threshold):
+        print("Regressions:", *regressions, sep="\n  ")
+        return 1
+    print("No regressions.")
+    return 0
@@ -0,0 +1,83 @@
+import math
+
+def fib(scale):
+    n = max(2, 20 + round(math.log(scale, (1 + 5 ** 0.5) / 2)))
+    calls = [1, 1]
+    while len(calls) <= n: calls.append(calls[-1] + calls[-2] + 1)
+    return f"""
+           def fib(n) {{ if less(n, 2) {{ return n; }} return fib(n - 1) + fib(n - 2); }}
+           print fib({n});
+           """, calls[n]
+
+def closure_counters(scale):
+    counters, calls = 100, max(1, round(200 * scale))
+    return f"""
+           def make_counter() {{
+               var count = 0;
+               return func() {{ set count = count + 1; return count; }};
+           }}
+           var total = 0;
+           var i = 0;
+           while i # {counters} {{
+               var counter = make_counter();
+               var j = 0;
+               while j # {calls} {{ set total = total + counter(); set j = j + 1; }}
+               set i = i + 1;
+           }}
+           print total;
+           """, counters * calls
+
+def captured_closures(scale):
+    n = max(1, round(5_000 * scale))
+    return f"""
+           def cons(head, tail) {{
+               var scratch = 7 ^ 1000 + head;
+               return func(first) {{ if first {{ return head; }} return tail; }};
+           }}
+           var list = 0;
+           var i = 0;
+           while i # {n} {{ set list = cons(i, list); set i = i + 1; }}
+           var sum = 0;
+           while list # 0 {{ set sum = sum + list(true); set list = list(false); }}
+           print sum;
+           """, n
+
+def while_loop(scale):
+    n = max(1, round(200_000 * scale))
+    return f"var i = 0; while i # {n} {{ set i = i + 1; }} print i;", n
+
+def nested_lookup(scale):
+    depth, n = 20, max(1, round(50_000 * scale))
+    opening = "".join(f"{{ var v{d} = {d}; " for d in range(depth))
+    return f"""
+           var x = 1;
+           var sum = 0;
+           {opening}
+           var i = 0;
+           while i # {n} {{ set sum = sum + x; set i = i + 1; }}
+           {"}" * depth}
+           print sum;
+           """, n
+
+def tail_calls(scale):
+    n = max(1, round(1_000_000 * scale))
+    return f"""
+           def loop(n) {{ if n = 0 {{ return 0; }} return loop(n - 1); }}
+           print loop({n});
+           """, n + 1
+
+def large_source(scale):
+    count = max(1, round(20_000 * scale))
+    return "".join(f"def f{i}(a, b) {{ var c = a + b * {i}; if less(c, 10) {{ print c; }} "
+                   f"else {{ set c = c - 1; }} return f{i}(c, 1); }}\n"
+                   for i in range(count)), count
+
+WORKLOADS = {
+    "fib": fib,
+    "closure_counters": closure_counters,
+    "captured_closures": captured_closures,
+    "while_loop": while_loop,
+    "nested_lookup": nested_lookup,
+    "tail_calls": tail_calls,
+    "large_source": large_source,
+}
@@ -1,49 +1,156 @@
+import codecs
+import operator
+import re
+from array import array
+from functools import lru_cache
+from itertools import repeat
+
+EOF, NAME, NUMBER, SYMBOL, BOOLEAN = range(5)
+CHUNK_SIZE = 1 << 16
+UNLIMITED = 1 << 62
+MAX_ARRAY_LEN = 1 << 20
+PRECEDENCE = {
+    "or": 1, "and": 2, "=": 3, "#": 3, "<": 3, ">": 3, "<=": 3, ">=": 3, "+": 4, "-": 4, "*": 5, "/": 5, "^": 6,
+}
+RIGHT_ASSOCIATIVE = { "^" }
+WORD_OPERATORS = { "and", "or" }
+
 class Scanner:
-    def __init__(self, source) -> None:
+    _TOKEN_PATTERN = re.compile(r"([^\W\d_]\w*)|(\d+)|(<=|>=|\S)")
+    _KEYWORDS = { "true": True, "false": False }
+
+    def __init__(self, source, chunk_size=CHUNK_SIZE) -> None:
+        self.kinds = array("B")
+        self.values = []
+        self.offsets = array("q")
+        self._current_index = 0
+        self._start = 0
+        self._lines = 0
+        self._line_start = 0
+        if isinstance(source, str):
+            self._reader = None
+            self._source = source
+            self._tokenize(at_end=True)
+        else:
+            self._reader = source
+            self._chunk_size = chunk_size
+            self._decoder = codecs.getincrementaldecoder("utf-8")()
+            self._source = ""
+            self._rest = ""
+            self.refill()
+
+    def refill(self):
+        while self._reader is not None:
+            self._read_chunk()
+            if self.values: return True
+        return False
+
+    def _read_chunk(self):
+        text = self._rest
+        while True:
+            data = self._reader.read(self._chunk_size)
+            at_end = not data
+            if isinstance(data, bytes): data = self._decoder.decode(data, final=at_end)
+            text += data
+            if at_end:
+                self._reader = None
+                cut = len(text)
+                break
+            cut = len(text)
+            while cut and not text[cut - 1].isspace(): cut -= 1
+            if cut: break
+        self._advance(text[:cut])
+        self._rest = text[cut:]
+        self._tokenize(at_end=self._reader is None)
+
+    def _advance(self, source):
+        if (newlines := self._source.count("\n")):
+            self._lines += newlines
+            self._line_start = self._start + self._source.rindex("\n") + 1
+        self._start += len(self._source)
         self._source = source
-        self._current_position = 0
+        del self.kinds[:], self.values[:], self.offsets[:]
+        self._current_index = 0
+
+    def _tokenize(self, at_end):
+        add_kind, add_value, add_offset = self.kinds.append, self.values.append, self.offsets.append
+        keywords = self._KEYWORDS
+        start = self._start
+        for match in self._TOKEN_PATTERN.finditer(self._source):
+            kind = match.lastindex
+            token = match[kind]
+            if kind == NAME and token in keywords:
+                kind, token = BOOLEAN, keywords[token]
+            elif kind == NUMBER:
+                token = int(token)
+            add_kind(kind)
+            add_value(token)
+            add_offset(start + match.start())
+        if at_end:
+            add_kind(EOF)
+            add_value("$EOF")
+            add_offset(start + len(self._source))
 
     def next_token(self):
-        while self._current_char().isspace(): self._current_position += 1
-
-        start = self._current_position
-        match self._current_char():
-            case "$EOF": return "$EOF"
-            case c if c.isalpha():
-                while self._current_char().isalnum() or self._current_char() == "_":
-                    self._current_position += 1
-                token = self._source[start:self._current_position]
-                match token:
-                    case "true": return True
-                    case "false": return False
-                    case _: return token
-            case c if c.isnumeric():
-                while self._current_char().isnumeric():
-                    self._current_position += 1
-                return int(self._source[start:self._current_position])
-            case _:
-                self._current_position += 1
-                return self._source[start:self._current_position]
-
-    def _current_char(self):
-        if self._current_position < len(self._source):
-            return self._source[self._current_position]
-        else:
-            return "$EOF"
+        if self._current_index == len(self.values) and not self.refill(): return self.values[-1]
+        token = self.values[self._current_index]
+        self._current_index += 1
+        return token
+
+    def line_col(self, offset):
+        offset -= self._start
+        line = self._lines + self._source.count("\n", 0, offset) + 1
+        if (line_start := self._source.rfind("\n", 0, offset)) < 0:
+            return line, self._start + offset - self._line_start + 1
+        return line, offset - line_start
+
+class Located(list):
+    __slots__ = ("pos",)
+
+    def __init__(self, items, pos):
+        super().__init__(items)
+        self.pos = pos
 
 class Parser:
-    def __init__(self, source):
-        self.scanner = Scanner(source)
-        self._current_token = ""
-        self._next_token()
+    cache = None
+
+    def __init__(self, source, chunk_size=CHUNK_SIZE, cache=None, track_positions=False):
+        if cache is not None: self.cache = cache
+        self.track_positions = track_positions
+        self._source = source if isinstance(source, str) and self.cache is not None and not track_positions else None
+        self._cached = None if self._source is None else self.cache.load(self._source)
+        self._started = False
+        self.scanner = Scanner(source if self._cached is None else "", chunk_size)
+        self._load_tokens()
+        self._current_token = self._tokens[0]
+
+    def position(self):
+        return self.scanner.line_col(self.scanner.offsets[self._index])
 
     def parse_program(self):
-        program: list = ["program"]
+        return ["program", *self.parse_statements()]
+
+    def parse_statements(self):
+        if self._cached is not None:
+            yield from self._cached[1:]
+            return
+        store, self._started = self._source is not None and not self._started, True
+        statements = []
         while self._current_token != "$EOF":
-            program.append(self._parse_statement())
-        return program
+            statement = self._parse_statement()
+            if store: statements.append(statement)
+            yield statement
+        if store:
+            self._cached = ["program", *statements]
+            self.cache.store(self._source, self._cached)
 
     def _parse_statement(self):
+        if not self.track_positions: return self._parse_bare_statement()
+        position = self.position()
+        statement = self._parse_bare_statement()
+        return statement if statement.__class__ is Located else Located(statement, position)
+
+    def _parse_bare_statement(self):
         match self._current_token:
             case "{": return self._parse_block()
             case "var" | "set": return self._parse_var_set()
@@ -55,7 +162,7 @@ class Parser:
             case _: return self._parse_expression_statement()
 
     def _parse_block(self):
-        block: list = ["block"]
+        block: list = Located(["block"], self.position()) if self.track_positions else ["block"]
         self._next_token()
         while self._current_token != "}":
             block.append(self._parse_statement())
@@ -67,6 +174,14 @@ class Parser:
         self._next_token()
         name = self._parse_primary()
         assert isinstance(name, str),  f"Expected a name, found `{name}`."
+        if op == "set" and self._current_token == "[":
+            self._next_token()
+            index = self._parse_expression()
+            self._consume_token("]")
+            self._consume_token("=")
+            value = self._parse_expression()
+            self._consume_token(";")
+            return ["[]=", name, index, value]
         self._consume_token("=")
         value = self._parse_expression()
         self._consume_token(";")
@@ -120,37 +235,67 @@ class Parser:
         return ["expr", expr]
 
     def _parse_expression(self):
-        return self._parse_equality()
-
-    def _parse_equality(self): return self._parse_binop_left(("=", "#"), self._parse_add_sub)
-    def _parse_add_sub(self): return self._parse_binop_left(("+", "-"), self._parse_mult_div)
-    def _parse_mult_div(self): return self._parse_binop_left(("*", "/"), self._parse_power)
-
-    def _parse_binop_left(self, ops, sub_element):
-        result = sub_element()
-        while (op := self._current_token) in ops:
-            self._next_token()
-            result = [op, result, sub_element()]
-        return result
-
-    def _parse_power(self):
-        power = self._parse_call()
-        if self._current_token != "^": return power
-        self._next_token()
-        return ["^", power, self._parse_power()]
-
-    def _parse_call(self):
-        call = self._parse_primary()
-        while self._current_token == "(":
-            self._next_token()
-            args = []
-            while self._current_token != ")":
-                args.append(self._parse_expression())
-                if self._current_token != ")":
-                    self._consume_token(",")
-            call = [call] + args
-            self._consume_token(")")
-        return call
+        operands, ops = [], []
+        while True:
+            match self._current_token:
+                case "(":
+                    ops.append(None)
+                    self._next_token()
+                    continue
+                case "[":
+                    if self._next_token() != "]":
+                        ops.append(["[...]"])
+                        continue
+                    self._next_token()
+                    operand = ["[...]"]
+                case "func": operand = self._parse_func()
+                case "and" | "or" as unexpected: assert False, f"Unexpected token `{unexpected}`."
+                case operand: self._next_token()
+            while True:
+                match self._current_token:
+                    case "(":
+                        if self._next_token() != ")":
+                            ops.append([operand])
+                            break
+                        self._next_token()
+                        operand = [operand]
+                        continue
+                    case "[":
+                        self._next_token()
+                        ops.append(("[]", operand))
+                        break
+                operands.append(operand)
+                if (op := self._current_token) in PRECEDENCE:
+                    precedence = PRECEDENCE[op] + (op in RIGHT_ASSOCIATIVE)
+                    while ops and ops[-1].__class__ is str and PRECEDENCE[ops[-1]] >= precedence:
+                        b = operands.pop()
+                        operands[-1] = [ops.pop(), operands[-1], b]
+                    ops.append(op)
+                    self._next_token()
+                    break
+                while ops and ops[-1].__class__ is str:
+                    b = operands.pop()
+                    operands[-1] = [ops.pop(), operands[-1], b]
+                if not ops: return operands.pop()
+                match ops.pop():
+                    case None:
+                        self._consume_token(")")
+                        operand = operands.pop()
+                        continue
+                    case ("[]", target):
+                        self._consume_token("]")
+                        operand = ["[]", target, operands.pop()]
+                        continue
+                    case call:
+                        call.append(operands.pop())
+                        close = "]" if call[0] == "[...]" else ")"
+                        if self._current_token != close: self._consume_token(",")
+                        if self._current_token != close:
+                            ops.append(call)
+                            break
+                        self._next_token()
+                        operand = call
+                        continue
 
     def _parse_primary(self):
         match self._current_token:
@@ -160,6 +305,7 @@ class Parser:
                 self._consume_token(")")
                 return exp
             case "func": return self._parse_func()
+            case "and" | "or" as unexpected: assert False, f"Unexpected token `{unexpected}`."
             case int(value) | bool(value) | str(value):
                 self._next_token()
                 return value
@@ -176,7 +322,7 @@ class Parser:
         params = []
         while self._current_token != ")":
             param = self._current_token
-            assert isinstance(param, str), f"Name expected, found `{param}`."
+            assert isinstance(param, str) and param not in WORD_OPERATORS, f"Name expected, found `{param}`."
             self._next_token()
             params.append(param)
             if self._current_token != ")":
@@ -193,12 +339,266 @@ class Parser:
                f"Expected `{expected_token}`, found `{self._current_token}`."
 
     def _next_token(self):
-        self._current_token = self.scanner.next_token()
+        if self._index < self._last_index: self._index += 1
+        elif self.scanner.refill(): self._load_tokens()
+        self._current_token = self._tokens[self._index]
         return self._current_token
 
-class Return(Exception):
+    def _load_tokens(self):
+        self._tokens = self.scanner.values
+        self._last_index = len(self._tokens) - 1
+        self._index = 0
+
+(PROGRAM, BLOCK, SEQ, VAR, SET, IF, WHILE, RETURN, PRINT, EXPR,
+ CONST, VARIABLE, FUNC, CALL, POW, MUL, DIV, ADD, SUB, EQ, NE, LT, GT, LE, GE, AND, OR, LESS,
+ SET_INDEX, ARRAY, INDEX) = range(31)
+
+class Node:
+    __slots__ = ()
+
+    def __init__(self, *fields):
+        for field, value in zip(self.__match_args__, fields): setattr(self, field, value)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({', '.join(repr(getattr(self, f)) for f in self.__match_args__)})"
+
+class Statement(Node):
+    __slots__ = ("pos",)
+
+    def __init__(self, *fields):
+        super().__init__(*fields)
+        self.pos = None
+
+class Program(Node):
+    __slots__ = __match_args__ = ("statements",)
+    op, tag = PROGRAM, "program"
+
+class Block(Statement):
+    __slots__ = __match_args__ = ("statements",)
+    op, tag = BLOCK, "block"
+
+class Seq(Statement):
+    __slots__ = __match_args__ = ("statements",)
+    op, tag = SEQ, "seq"
+
+class Var(Statement):
+    __slots__ = __match_args__ = ("name", "value")
+    op, tag = VAR, "var"
+
+class Set(Statement):
+    __slots__ = __match_args__ = ("name", "value")
+    op, tag = SET, "set"
+
+class If(Statement):
+    __slots__ = __match_args__ = ("cond", "conseq", "alt")
+    op, tag = IF, "if"
+
+class While(Statement):
+    __slots__ = __match_args__ = ("cond", "body")
+    op, tag = WHILE, "while"
+
+class Return(Statement):
+    __slots__ = __match_args__ = ("value",)
+    op, tag = RETURN, "return"
+
+class Print(Statement):
+    __slots__ = __match_args__ = ("expr",)
+    op, tag = PRINT, "print"
+
+class Expr(Statement):
+    __slots__ = __match_args__ = ("expr",)
+    op, tag = EXPR, "expr"
+
+class SetIndex(Statement):
+    __slots__ = __match_args__ = ("target", "index", "value")
+    op, tag = SET_INDEX, "[]="
+
+class Const(Node):
+    __slots__ = __match_args__ = ("value",)
+    op = CONST
+
+class Variable(Node):
+    __slots__ = __match_args__ = ("name",)
+    op = VARIABLE
+
+class Func(Node):
+    __slots__ = __match_args__ = ("params", "body")
+    op, tag = FUNC, "func"
+
+class Call(Node):
+    __slots__ = __match_args__ = ("func", "args")
+    op = CALL
+
+class Array(Node):
+    __slots__ = __match_args__ = ("elements",)
+    op, tag = ARRAY, "[...]"
+
+class Index(Node):
+    __slots__ = __match_args__ = ("target", "index")
+    op, tag = INDEX, "[]"
+
+class LessCall(Call):
+    __slots__ = ()
+    op = LESS
+
+class Binary(Node): __slots__ = __match_args__ = ("a", "b")
+class Pow(Binary):
+    __slots__ = ()
+    op, tag = POW, "^"
+
+class Mul(Binary):
+    __slots__ = ()
+    op, tag = MUL, "*"
+
+class Div(Binary):
+    __slots__ = ()
+    op, tag = DIV, "/"
+
+class Add(Binary):
+    __slots__ = ()
+    op, tag = ADD, "+"
+
+class Sub(Binary):
+    __slots__ = ()
+    op, tag = SUB, "-"
+
+class Eq(Binary):
+    __slots__ = ()
+    op, tag = EQ, "="
+
+class Ne(Binary):
+    __slots__ = ()
+    op, tag = NE, "#"
+
+class Lt(Binary):
+    __slots__ = ()
+    op, tag = LT, "<"
+
+class Gt(Binary):
+    __slots__ = ()
+    op, tag = GT, ">"
+
+class Le(Binary):
+    __slots__ = ()
+    op, tag = LE, "<="
+
+class Ge(Binary):
+    __slots__ = ()
+    op, tag = GE, ">="
+
+class And(Binary):
+    __slots__ = ()
+    op, tag = AND, "and"
+
+class Or(Binary):
+    __slots__ = ()
+    op, tag = OR, "or"
+
+BINARY_NODES = { node.tag: node for node in (Pow, Mul, Div, Add, Sub, Eq, Ne, Lt, Gt, Le, Ge, And, Or) }
+_const_node = lru_cache(maxsize=1 << 12, typed=True)(Const)
+_variable_node = lru_cache(maxsize=1 << 12)(Variable)
+
+def compact(ast):
+    less_call = Call if declares(ast, "less") else LessCall
+    match ast:
+        case ["program", *statements]:
+            return Program(tuple(_compact_statement(statement, less_call) for statement in statements))
+        case _: return _compact_statement(ast, less_call)
+
+def declares(ast, name):
+    stack = [ast]
+    while stack:
+        match stack.pop():
+            case ["var", declared, value]:
+                if declared == name: return True
+                stack.append(value)
+            case ["func", params, body]:
+                if name in params: return True
+                stack.append(body)
+            case list(items): stack += items
+    return False
+
+def _compact_statement(statement, less_call=Call):
+    match statement:
+        case ["block", *statements]:
+            node = Block(tuple(_compact_statement(statement, less_call) for statement in statements))
+        case ["seq", *statements]:
+            node = Seq(tuple(_compact_statement(statement, less_call) for statement in statements))
+        case ["var", name, value]: node = Var(name, _compact_expr(value, less_call))
+        case ["set", name, value]: node = Set(name, _compact_expr(value, less_call))
+        case ["if", cond, conseq, alt]:
+            node = If(_compact_expr(cond, less_call),
+                      _compact_statement(conseq, less_call), _compact_statement(alt, less_call))
+        case ["while", cond, body]:
+            node = While(_compact_expr(cond, less_call), _compact_statement(body, less_call))
+        case ["return", value]: node = Return(_compact_expr(value, less_call))
+        case ["print", expr]: node = Print(_compact_expr(expr, less_call))
+        case ["expr", expr]: node = Expr(_compact_expr(expr, less_call))
+        case ["[]=", target, index, value]:
+            node = SetIndex(_compact_expr(target, less_call), _compact_expr(index, less_call),
+                            _compact_expr(value, less_call))
+        case unexpected: assert False, f"Internal Error at `{unexpected}`."
+    if statement.__class__ is Located: node.pos = statement.pos
+    return node
+
+def _compact_expr(expr, less_call=Call):
+    match expr:
+        case int(value) | bool(value): return _const_node(value)
+        case str(name): return _variable_node(name)
+        case ["func", params, body]: return Func(tuple(params), _compact_statement(body, less_call))
+        case [str(op), a, b] if op in PRECEDENCE:
+            return BINARY_NODES[op](_compact_expr(a, less_call), _compact_expr(b, less_call))
+        case ["[...]", *elements]:
+            return Array(tuple(_compact_expr(element, less_call) for element in elements))
+        case ["[]", target, index]:
+            return Index(_compact_expr(target, less_call), _compact_expr(index, less_call))
+        case ["less", a, b]:
+            return less_call(_variable_node("less"),
+                             (_compact_expr(a, less_call), _compact_expr(b, less_call)))
+        case [func, *args]:
+            return Call(_compact_expr(func, less_call),
+                        tuple(_compact_expr(arg, less_call) for arg in args))
+        case unexpected: assert False, f"Internal Error at `{unexpected}`."
+
+def to_list(node):
+    match node:
+        case list(): return node
+        case Program(statements) | Block(statements) | Seq(statements): return [node.tag, *map(to_list, statements)]
+        case Var(name, value) | Set(name, value): return [node.tag, name, to_list(value)]
+        case If(cond, conseq, alt): return ["if", to_list(cond), to_list(conseq), to_list(alt)]
+        case While(cond, body): return ["while", to_list(cond), to_list(body)]
+        case Return(value): return ["return", to_list(value)]
+        case Print(expr) | Expr(expr): return [node.tag, to_list(expr)]
+        case SetIndex(target, index, value): return ["[]=", to_list(target), to_list(index), to_list(value)]
+        case Const(value): return value
+        case Variable(name): return name
+        case Func(params, body): return ["func", list(params), to_list(body)]
+        case Call(func, args): return [to_list(func), *map(to_list, args)]
+        case Array(elements): return ["[...]", *map(to_list, elements)]
+        case Index(target, index): return ["[]", to_list(target), to_list(index)]
+        case Binary(a, b): return [node.tag, to_list(a), to_list(b)]
+        case unexpected: assert False, f"Internal Error at `{unexpected}`."
+
+class Returned:
+    __slots__ = ("value",)
+
     def __init__(self, value): self.value = value
 
+class TailCall:
+    __slots__ = ("func", "args")
+
+    def __init__(self, func, args):
+        self.func = func
+        self.args = args
+
+class Closure:
+    __slots__ = ("params", "body", "env", "__weakref__")
+
+    def __init__(self, params, body, env):
+        self.params = params
+        self.body = body
+        self.env = env
+
 class Environment:
     def __init__(self, parent:"Environment | None"=None):
         self._values = {}
@@ -222,122 +622,378 @@ class Environment:
         if self._parent is None: return [self._values]
         return self._parent.list() + [self._values]
 
+def make_array(values):
+    try: return memoryview(array("q", values))
+    except (TypeError, OverflowError): assert False, "Array elements must be 64-bit integers."
+
+def array_index(values, i):
+    _check_index(values, i)
+    return values[i]
+
+def array_store(values, i, value):
+    _check_index(values, i)
+    try: values[i] = value
+    except (TypeError, ValueError): assert False, "Array elements must be 64-bit integers."
+
+def _check_array(values):
+    assert values.__class__ is memoryview, "Array expected."
+
+def _check_index(values, i):
+    _check_array(values)
+    assert i.__class__ is int and 0 <= i < len(values), f"Index `{i}` out of range."
+
+def _new_array(size):
+    assert size.__class__ is int and size >= 0, "Array size must be a non-negative integer."
+    return memoryview(array("q", bytes(8 * size)))
+
+def _array_len(values):
+    _check_array(values)
+    return len(values)
+
+def _array_fill(values, value):
+    _check_array(values)
+    values[:] = make_array((value,)).obj * len(values)
+    return values
+
+def _array_sum(values):
+    _check_array(values)
+    return sum(values)
+
+def _elementwise(op):
+    def apply(a, b):
+        _check_array(a)
+        if b.__class__ is not memoryview: return make_array(map(op, a, repeat(b, len(a))))
+        assert len(a) == len(b), "Array lengths differ."
+        return make_array(map(op, a, b))
+    return apply
+
+def _array_slice(values, start, stop):
+    _check_array(values)
+    assert start.__class__ is int and stop.__class__ is int and 0 <= start <= stop <= len(values), \
+           f"Slice `{start}:{stop}` out of range."
+    return values[start:stop]
+
+ARRAY_BUILTINS = {
+    "array": _new_array, "array_len": _array_len, "array_fill": _array_fill, "array_sum": _array_sum,
+    "array_add": _elementwise(operator.add), "array_mul": _elementwise(operator.mul), "array_slice": _array_slice,
+}
+
 class Evaluator:
-    def __init__(self):
-        self.output = []
+    def __init__(self, max_steps=None, max_depth=None, max_int_bits=None, max_array_len=None, sink=None):
+        self._sink = sink
+        self._reset_output()
         self._env = Environment()
-        self._env.define("less", lambda a, b: a < b)
+        self._globals = self._env._values
+        self._less = lambda a, b: a < b
+        self._env.define("less", self._less)
         self._env.define("print_env", self._print_env)
+        self._env.define("pmap", self._pmap)
+        for name, func in ARRAY_BUILTINS.items(): self._env.define(name, func)
+        self._max_steps = max_steps
+        self._max_depth = max_depth
+        self._max_int_bits = max_int_bits
+        self._max_array_len = max_array_len
+        self._limited = (max_steps, max_depth, max_int_bits, max_array_len) != (None, None, None, None)
+        self._install_limits()
+
+    def _install_limits(self):
+        if not self._limited: return
+        if self._max_array_len is None: self._max_array_len = MAX_ARRAY_LEN
+        self._globals["array"] = self._limited_new_array
+        dispatch = self._DISPATCH = dict(self._DISPATCH)
+        if self._max_int_bits is not None:
+            dispatch[POW] = Evaluator._eval_limited_pow
+            for op in (MUL, ADD, SUB): dispatch[op] = self._limit_int(dispatch[op])
+        if self._max_steps is None and self._max_depth is None: return
+        if self._max_steps is None: self._max_steps = UNLIMITED
+        if self._max_depth is None: self._max_depth = UNLIMITED
+        dispatch[WHILE] = Evaluator._eval_limited_while
+        self._fuel = self._max_steps
+        self._depth = 0
+        self._invoke = self._limited_invoke
+
+    def _limit_int(self, handler):
+        def check(evaluator, node):
+            value = handler(evaluator, node)
+            if value.__class__ is int: evaluator._check_int(value)
+            return value
+        return check
+
+    def _check_int(self, value):
+        assert value.bit_length() <= self._max_int_bits, "Integer size limit exceeded."
+
+    def _limited_new_array(self, size):
+        assert size.__class__ is not int or size <= self._max_array_len, "Array size limit exceeded."
+        return _new_array(size)
+
+    def _eval_limited_pow(self, e):
+        a, b = self._eval_expr(e.a), self._eval_expr(e.b)
+        if isinstance(a, int) and isinstance(b, int) and b > 0:
+            assert (abs(a).bit_length() - 1) * b < self._max_int_bits, "Integer size limit exceeded."
+        if (value := a ** b).__class__ is int: self._check_int(value)
+        return value
+
+    def _eval_limited_while(self, while_):
+        while self._eval_expr(while_.cond):
+            self._fuel -= 1
+            assert self._fuel >= 0, "Step limit exceeded."
+            if (ret := self._eval_statement(while_.body)) is not None: return ret
+
+    def _limited_invoke(self, func, args):
+        self._fuel -= 1
+        assert self._fuel >= 0, "Step limit exceeded."
+        self._depth += 1
+        try:
+            assert self._depth <= self._max_depth, "Call depth limit exceeded."
+            return type(self)._invoke(self, func, args)
+        finally: self._depth -= 1
 
     def _print_env(self):
         for values in self._env.list():
             print({ k: self._to_print(v) for k, v in values.items() })
 
+    def _pmap(self, func, n):
+        from minilang_parallel import pmap
+        return pmap(self, func, n)
+
     def eval_program(self, program):
-        self.output = []
-        match program:
-            case ["program", *statements]:
-                for statement in statements:
-                    self._eval_statement(statement)
-            case unexpected: assert False, f"Internal Error at `{unexpected}`."
+        self._reset_output()
+        self._fuel = self._max_steps
+        try:
+            match compact(program) if isinstance(program, list) else program:
+                case Program(statements):
+                    for statement in statements:
+                        if self._eval_top_level(statement): break
+                case unexpected: assert False, f"Internal Error at `{unexpected}`."
+        finally: self._flush_output()
+
+    def eval_statements(self, statements):
+        self._fuel = self._max_steps
+        for statement in statements:
+            self._reset_output()
+            try: stop = self._eval_top_level(compact(statement) if isinstance(statement, list) else statement)
+            finally: self._flush_output()
+            yield from self._printed()
+            if stop: break
+
+    def _reset_output(self):
+        self.output = [] if self._sink is None else self._sink
+
+    def _flush_output(self):
+        if self._sink is not None: self._sink.flush()
+
+    def _printed(self):
+        return self.output if self._sink is None else ()
+
+    def _eval_top_level(self, statement):
+        env = self._env
+        try:
+            if (ret := self._eval_statement(statement)) is None: return False
+            if isinstance(ret.value, TailCall): self._apply(ret.value.func, ret.value.args)
+            return True
+        except RecursionError: assert False, "Call depth limit exceeded."
+        finally: self._env = env
 
     def _eval_statement(self, statement):
-        match statement:
-            case ["block", *statements]: self._eval_block(statements)
-            case ["var", name, value]: self._eval_var(name, value)
-            case ["set", name, value]: self._eval_set(name, value)
-            case ["if", cond, conseq, alt]: self._eval_if(cond, conseq, alt)
-            case ["while", cond, body]: self._eval_while(cond, body)
-            case ["return", value]: raise Return(self._eval_expr(value))
-            case ["print", expr]: self._eval_print(expr)
-            case ["expr", expr]: self._eval_expr(expr)
-            case unexpected: assert False, f"Internal Error at `{unexpected}`."
-
-    def _eval_block(self, statements):
+        return self._DISPATCH[statement.op](self, statement)
+
+    def _eval_block(self, block):
         parent_env = self._env
         self._env = Environment(parent_env)
-        for statement in statements:
-            self._eval_statement(statement)
+        ret = None
+        for statement in block.statements:
+            if (ret := self._eval_statement(statement)) is not None: break
         self._env = parent_env
+        return ret
 
-    def _eval_var(self, name, value):
-        self._env.define(name, self._eval_expr(value))
+    def _eval_seq(self, seq):
+        for statement in seq.statements:
+            if (ret := self._eval_statement(statement)) is not None: return ret
 
-    def _eval_set(self, name, value):
-        self._env.assign(name, self._eval_expr(value))
+    def _eval_var(self, var):
+        self._env.define(var.name, self._eval_expr(var.value))
 
-    def _eval_if(self, cond, conseq, alt):
-        if self._eval_expr(cond):
-            self._eval_statement(conseq)
+    def _eval_set(self, set_):
+        self._env.assign(set_.name, self._eval_expr(set_.value))
+
+    def _eval_if(self, if_):
+        if self._eval_expr(if_.cond):
+            return self._eval_statement(if_.conseq)
         else:
-            self._eval_statement(alt)
+            return self._eval_statement(if_.alt)
+
+    def _eval_while(self, while_):
+        while self._eval_expr(while_.cond):
+            if (ret := self._eval_statement(while_.body)) is not None: return ret
 
-    def _eval_while(self, cond, body):
-        while self._eval_expr(cond):
-            self._eval_statement(body)
+    def _eval_return(self, return_):
+        return Returned(self._eval_return_value(return_.value))
 
-    def _eval_print(self, expr):
-        self.output.append(self._to_print(self._eval_expr(expr)))
+    def _eval_return_value(self, value):
+        if value.op != CALL: return self._eval_expr(value)
+        func = self._eval_expr(value.func)
+        args = [self._eval_expr(arg) for arg in value.args]
+        return func(*args) if callable(func) else TailCall(func, args)
+
+    def _eval_print(self, print_):
+        self.output.append(self._to_print(self._eval_expr(print_.expr)))
+
+    def _eval_expr_statement(self, expr):
+        self._eval_expr(expr.expr)
 
     def _to_print(self, value):
         match value:
             case bool(b): return "true" if b else "false"
+            case memoryview(): return f"[{', '.join(map(str, value.tolist()))}]"
             case v if callable(v): return "<builtin>"
-            case ["func", *_]: return "<func>"
+            case Closure(): return "<func>"
             case _: return value
 
     def _eval_expr(self, expr):
-        match expr:
-            case int(value) | bool(value): return value
-            case str(name): return self._eval_variable(name)
-            case ["func", param, body]: return ["func", param, body, self._env]
-            case ["^", a, b]: return self._eval_expr(a) ** self._eval_expr(b)
-            case ["*", a, b]: return self._eval_expr(a) * self._eval_expr(b)
-            case ["/", a, b]: return self._div(self._eval_expr(a), self._eval_expr(b))
-            case ["+", a, b]: return self._eval_expr(a) + self._eval_expr(b)
-            case ["-", a, b]: return self._eval_expr(a) - self._eval_expr(b)
-            case ["=", a, b]: return self._eval_expr(a) == self._eval_expr(b)
-            case ["#", a, b]: return self._eval_expr(a) != self._eval_expr(b)
-            case [func, *args]:
-                return self._apply(self._eval_expr(func),
-                                   [self._eval_expr(arg) for arg in args])
-            case unexpected: assert False, f"Internal Error at `{unexpected}`."
+        return self._DISPATCH[expr.op](self, expr)
+
+    def _eval_const(self, const): return const.value
+    def _eval_func(self, func): return Closure(func.params, func.body, self._env)
+    def _eval_pow(self, e): return self._eval_expr(e.a) ** self._eval_expr(e.b)
+    def _eval_mul(self, e): return self._eval_expr(e.a) * self._eval_expr(e.b)
+    def _eval_div(self, e): return self._div(self._eval_expr(e.a), self._eval_expr(e.b))
+    def _eval_add(self, e): return self._eval_expr(e.a) + self._eval_expr(e.b)
+    def _eval_sub(self, e): return self._eval_expr(e.a) - self._eval_expr(e.b)
+    def _eval_eq(self, e): return self._eval_expr(e.a) == self._eval_expr(e.b)
+    def _eval_ne(self, e): return self._eval_expr(e.a) != self._eval_expr(e.b)
+    def _eval_lt(self, e): return self._eval_expr(e.a) < self._eval_expr(e.b)
+    def _eval_gt(self, e): return self._eval_expr(e.a) > self._eval_expr(e.b)
+    def _eval_le(self, e): return self._eval_expr(e.a) <= self._eval_expr(e.b)
+    def _eval_ge(self, e): return self._eval_expr(e.a) >= self._eval_expr(e.b)
+    def _eval_and(self, e): return self._eval_expr(e.a) and self._eval_expr(e.b)
+    def _eval_or(self, e): return self._eval_expr(e.a) or self._eval_expr(e.b)
+
+    def _eval_set_index(self, set_index):
+        array_store(self._eval_expr(set_index.target), self._eval_expr(set_index.index),
+                    self._eval_expr(set_index.value))
+
+    def _eval_array(self, array_): return make_array([self._eval_expr(element) for element in array_.elements])
+    def _eval_index(self, e): return array_index(self._eval_expr(e.target), self._eval_expr(e.index))
+
+    def _eval_call(self, call):
+        return self._apply(self._eval_expr(call.func), [self._eval_expr(arg) for arg in call.args])
+
+    def _eval_less(self, call):
+        if self._globals["less"] is not self._less: return self._eval_call(call)
+        a, b = call.args
+        return self._eval_expr(a) < self._eval_expr(b)
 
     def _div(self, a, b):
         assert b != 0, f"Division by zero."
         return a // b
 
     def _apply(self, func, args):
-        if callable(func): return func(*args)
+        while True:
+            if callable(func): return func(*args)
+            if (ret := self._invoke(func, args)) is None: return 0
+            if not isinstance(ret.value, TailCall): return ret.value
+            func, args = ret.value.func, ret.value.args
 
-        [_, parameters, body, env] = func
+    def _invoke(self, func, args):
         parent_env = self._env
-        self._env = Environment(env)
-        for param, arg in zip(parameters, args): self._env.define(param, arg)
-        value = 0
-        try:
-            self._eval_statement(body)
-        except Return as ret:
-            value = ret.value
+        self._env = Environment(func.env)
+        for param, arg in zip(func.params, args): self._env.define(param, arg)
+        ret = self._eval_statement(func.body)
         self._env = parent_env
-        return value
+        return ret
+
+    def _eval_variable(self, variable):
+        return self._env.get(variable.name)
 
-    def _eval_variable(self, name):
-        return self._env.get(name)
+    _DISPATCH = {
+        BLOCK: _eval_block, SEQ: _eval_seq, VAR: _eval_var, SET: _eval_set, IF: _eval_if, WHILE: _eval_while,
+        RETURN: _eval_return, PRINT: _eval_print, EXPR: _eval_expr_statement,
+        CONST: _eval_const, VARIABLE: _eval_variable, FUNC: _eval_func, CALL: _eval_call,
+        POW: _eval_pow, MUL: _eval_mul, DIV: _eval_div, ADD: _eval_add, SUB: _eval_sub,
+        EQ: _eval_eq, NE: _eval_ne, LT: _eval_lt, GT: _eval_gt, LE: _eval_le, GE: _eval_ge,
+        AND: _eval_and, OR: _eval_or, LESS: _eval_less, SET_INDEX: _eval_set_index, ARRAY: _eval_array,
+        INDEX: _eval_index,
+    }
 
 if __name__ == "__main__":
+    import argparse
     import sys
 
-    evaluator = Evaluator()
-    while True:
-        print("Input source and enter Ctrl+D:")
-        if (source := sys.stdin.read()) == "": break
-
-        print("Output:")
-        try:
-            ast = Parser(source).parse_program()
-            print(ast)
-            evaluator.eval_program(ast)
-            print(*evaluator.output, sep="\n")
-        except AssertionError as e:
-            print("Error:", e)
+    from minilang import Evaluator, Parser, compact
+
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument("file", nargs="?")
+    arg_parser.add_argument("--optimize", action="store_true")
+    arg_parser.add_argument("--profile", action="store_true")
+    arg_parser.add_argument("--profile-collapsed", metavar="PATH")
+    arg_parser.add_argument("--max-steps", type=int)
+    arg_parser.add_argument("--max-depth", type=int)
+    arg_parser.add_argument("--max-int-bits", type=int)
+    arg_parser.add_argument("--max-array-len", type=int)
+    arg_parser.add_argument("--memoize", type=int, metavar="SIZE")
+    arg_parser.add_argument("--output-buffer", type=int, metavar="SIZE")
+    arg_parser.add_argument("--jit", type=int, metavar="CALLS")
+    arg_parser.add_argument("--restore", metavar="SNAPSHOT")
+    arg_parser.add_argument("--save", metavar="SNAPSHOT")
+    arg_parser.add_argument("--no-echo", action="store_true")
+    args = arg_parser.parse_args()
+    limits = (args.max_steps, args.max_depth, args.max_int_bits, args.max_array_len)
+    if args.jit is not None and limits != (None, None, None, None):
+        arg_parser.error("--jit cannot be combined with limits")
+
+    if args.optimize: from minilang_optimizer import Optimizer
+
+    sink = None
+    if args.file is not None and args.output_buffer is not None:
+        from minilang_sinks import WriterSink
+        sink = WriterSink(sys.stdout, args.output_buffer)
+    evaluator = Evaluator(*limits, sink)
+    if args.memoize is not None:
+        from minilang_memo import Memoizer
+        Memoizer(evaluator, args.memoize or None)
+    if args.jit is not None:
+        from minilang_jit import Jit
+        Jit(evaluator, args.jit)
+    if args.restore is not None or args.save is not None: import minilang_snapshot
+    if args.restore is not None: minilang_snapshot.restore(args.restore, evaluator)
+    profiling = args.profile or args.profile_collapsed is not None
+    if profiling:
+        from minilang_profiler import Profiler
+        profiler = Profiler(evaluator)
+
+    def report_profile():
+        if args.profile: print(profiler.table(), file=sys.stderr)
+        if args.profile_collapsed is not None:
+            with open(args.profile_collapsed, "w") as file: print(profiler.collapsed(), file=file)
+
+    if args.file is not None:
+        with open(args.file) as file:
+            optimizer = Optimizer(args.max_int_bits) if args.optimize else None
+            parser = Parser(file, track_positions=profiling)
+            parse_errors = []
+
+            def parse():
+                try: yield from parser.parse_statements()
+                except AssertionError as e:
+                    line, column = parser.position()
+                    parse_errors.append(f"Error at line {line}, column {column}: {e}")
+
+            try:
+                statements = parse()
+                if args.optimize: statements = optimizer.optimize_statements(statements)
+                for value in evaluator.eval_statements(statements):
+                    print(value)
+            except AssertionError as e:
+                print("Error:", e)
+            for error in parse_errors: print(error)
+        if args.optimize: print("Optimized:", optimizer.stats, file=sys.stderr)
+        if profiling: report_profile()
+        if args.save is not None: minilang_snapshot.save(evaluator, args.save)
+        sys.exit()
+
+    from minilang_repl import Repl
+    optimizer = Optimizer(args.max_int_bits) if args.optimize else None
+    Repl(evaluator, optimizer, not args.no_echo, profiling).run()
+    if args.optimize: print("Optimized:", optimizer.stats, file=sys.stderr)
+    if profiling: report_profile()
+    if args.save is not None: minilang_snapshot.save(evaluator, args.save)
@@ -0,0 +1,37 @@
+import asyncio
+
+from minilang import to_list
+from minilang_vm import Compiler, VM
+
+SLICE_STEPS = 1 << 10
+
+class AsyncEvaluator(VM):
+    def __init__(self, slice_steps=SLICE_STEPS, builtins=None, sink=None):
+        super().__init__(sink=sink)
+        self._slice_steps = slice_steps
+        for name, func in (builtins or {}).items(): self._env.define(name, func)
+
+    async def eval_program_async(self, program):
+        self._reset_output()
+        await self._execute_async(program)
+
+    async def eval_statements_async(self, statements):
+        for statement in statements:
+            self._reset_output()
+            stopped = await self._execute_async(["program", to_list(statement)])
+            for value in self._printed(): yield value
+            if stopped: break
+
+    async def _execute_async(self, program):
+        global_env = self._env
+        steps = self._steps(Compiler().compile_program(to_list(program)), global_env, self._slice_steps)
+        try:
+            value = None
+            while True:
+                awaitable = steps.send(value)
+                value = await (asyncio.sleep(0) if awaitable is None else awaitable)
+        except StopIteration as stop: return stop.value
+        finally:
+            steps.close()
+            self._env = global_env
+            self._flush_output()
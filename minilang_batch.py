@@ -0,0 +1,110 @@
+import os
+import signal
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from functools import partial
+
+from minilang import Parser, Evaluator
+from minilang_closure import ClosureEvaluator
+from minilang_vm import VM
+
+ENGINES = { "tree": Evaluator, "closure": ClosureEvaluator, "vm": VM }
+
+class Result:
+    __slots__ = ("output", "error")
+
+    def __init__(self, output, error=None):
+        self.output = output
+        self.error = error
+
+    def __eq__(self, other):
+        return isinstance(other, Result) and (self.output, self.error) == (other.output, other.error)
+
+    def __repr__(self):
+        return f"Result({self.output!r}, {self.error!r})"
+
+class Timeout(BaseException):
+    pass
+
+def run_batch(sources, workers=None, timeout=None, chunk_size=None, engine="tree", limits=None):
+    _check_limits(engine, limits)
+    sources = list(sources)
+    workers = workers or os.cpu_count() or 1
+    run_chunk = partial(_run_chunk, timeout=timeout, engine=engine, limits=limits)
+    if (workers <= 1 or len(sources) <= 1) and (timeout is None or _in_main_thread()): return run_chunk(sources)
+    if chunk_size is None: chunk_size = max(1, min(64, len(sources) // (workers * 4)))
+    chunks = [sources[i:i + chunk_size] for i in range(0, len(sources), chunk_size)]
+    with ProcessPoolExecutor(workers) as executor:
+        return [result for results in executor.map(run_chunk, chunks) for result in results]
+
+def run_one(source, timeout=None, engine="tree", limits=None):
+    _check_limits(engine, limits)
+    if timeout is not None and not _in_main_thread(): return run_batch([source], 1, timeout, None, engine, limits)[0]
+    evaluator = ENGINES[engine](**(limits or {}))
+    try:
+        with _deadline(timeout): return _run(source, evaluator)
+    except Timeout: return Result(evaluator.output, "Timed out.")
+
+def _in_main_thread():
+    return threading.current_thread() is threading.main_thread()
+
+def _check_limits(engine, limits):
+    assert not limits or engine == "tree", f"Limits are not supported by the `{engine}` engine."
+
+def _run(source, evaluator):
+    parser = Parser(source)
+    try: program = parser.parse_program()
+    except AssertionError as e:
+        line, column = parser.position()
+        return Result([], f"Error at line {line}, column {column}: {e}")
+    try: evaluator.eval_program(program)
+    except AssertionError as e: return Result(evaluator.output, str(e))
+    except Exception as e: return Result(evaluator.output, f"{type(e).__name__}: {e}")
+    return Result(evaluator.output)
+
+def _run_chunk(sources, timeout, engine, limits):
+    return [run_one(source, timeout, engine, limits) for source in sources]
+
+@contextmanager
+def _deadline(timeout):
+    if timeout is None or not hasattr(signal, "setitimer"):
+        yield
+        return
+    previous = signal.signal(signal.SIGALRM, _raise_timeout)
+    signal.setitimer(signal.ITIMER_REAL, timeout)
+    try: yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+def _raise_timeout(signum, frame):
+    raise Timeout()
+
+if __name__ == "__main__":
+    import argparse
+    import json
+    import sys
+
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument("files", nargs="+")
+    arg_parser.add_argument("--workers", type=int)
+    arg_parser.add_argument("--timeout", type=float)
+    arg_parser.add_argument("--chunk-size", type=int)
+    arg_parser.add_argument("--engine", choices=ENGINES, default="tree")
+    arg_parser.add_argument("--max-steps", type=int)
+    arg_parser.add_argument("--max-depth", type=int)
+    arg_parser.add_argument("--max-int-bits", type=int)
+    arg_parser.add_argument("--max-array-len", type=int)
+    args = arg_parser.parse_args()
+    limits = { name: value for name in ("max_steps", "max_depth", "max_int_bits", "max_array_len")
+                           if (value := getattr(args, name)) is not None }
+    if args.engine != "tree" and limits: arg_parser.error("--max-* limits require --engine tree")
+
+    sources = []
+    for path in args.files:
+        with open(path) as file: sources.append(file.read())
+    results = run_batch(sources, args.workers, args.timeout, args.chunk_size, args.engine, limits)
+    for path, result in zip(args.files, results):
+        print(json.dumps({ "file": path, "output": result.output, "error": result.error }))
+    sys.exit(any(result.error is not None for result in results))
@@ -0,0 +1,99 @@
+import gc
+import hashlib
+import inspect
+import marshal
+import os
+import sys
+
+import minilang
+
+FORMAT_VERSION = 1
+SUFFIX = ".mlc"
+
+def _grammar_version():
+    digest = hashlib.blake2b(digest_size=8)
+    for part in (inspect.getsource(minilang.Scanner), inspect.getsource(minilang.Parser),
+                 sorted(minilang.PRECEDENCE.items()), sorted(minilang.RIGHT_ASSOCIATIVE),
+                 sorted(minilang.WORD_OPERATORS)):
+        digest.update(f"{part}\0".encode())
+    return digest.hexdigest()
+
+GRAMMAR_VERSION = _grammar_version()
+
+class AstCache:
+    def __init__(self, directory, max_bytes=64 << 20):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def key(self, source):
+        digest = hashlib.blake2b(digest_size=16)
+        version = f"{FORMAT_VERSION}-{GRAMMAR_VERSION}-{sys.implementation.cache_tag}-{marshal.version}"
+        digest.update(f"minilang-{version}\0".encode())
+        digest.update(source.encode("utf-8", "surrogatepass"))
+        return digest.hexdigest()
+
+    def load(self, source):
+        path = self._path(source)
+        try:
+            with open(path, "rb") as file: data = file.read()
+            program = self._loads(data)
+            os.utime(path)
+        except FileNotFoundError: program = None
+        except (OSError, EOFError, ValueError, TypeError):
+            self._remove(path)
+            program = None
+        match program:
+            case ["program", *_]: self.hits += 1
+            case _:
+                self.misses += 1
+                program = None
+        return program
+
+    def store(self, source, program):
+        path = self._path(source)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(temp_path, "wb") as file: marshal.dump(program, file)
+            os.replace(temp_path, path)
+        except (OSError, ValueError):
+            self._remove(temp_path)
+            return
+        self._evict()
+
+    def _loads(self, data):
+        enabled = gc.isenabled()
+        gc.disable()
+        try: return marshal.loads(data)
+        finally:
+            if enabled: gc.enable()
+
+    def clear(self):
+        for _, _, path in self._entries(): self._remove(path)
+
+    def _path(self, source):
+        return os.path.join(self.directory, self.key(source) + SUFFIX)
+
+    def _entries(self):
+        entries = []
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if not entry.name.endswith(SUFFIX): continue
+                try: stat = entry.stat()
+                except FileNotFoundError: continue
+                entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+        return entries
+
+    def _evict(self):
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes: break
+            self._remove(path)
+            total -= size
+
+    def _remove(self, path):
+        try: os.remove(path)
+        except FileNotFoundError: pass
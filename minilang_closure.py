@@ -0,0 +1,381 @@
+from minilang import PRECEDENCE, Closure, Evaluator, TailCall, array_index, array_store, make_array, to_list
+from minilang_resolver import FIRST_SLOT, Resolver
+
+UNDEFINED = object()
+
+class Cell:
+    __slots__ = ("value",)
+
+    def __init__(self, value): self.value = value
+
+class Missing:
+    __slots__ = ("name",)
+
+    def __init__(self, name): self.name = name
+
+class ClosureCompiler:
+    def __init__(self, evaluator, global_env):
+        self._evaluator = evaluator
+        self._global_env = global_env
+        self._globals = global_env._values
+        self._check_missing = False
+
+    def compile_program(self, program, check_globals=True):
+        match Resolver(self._globals, check_globals).resolve(program):
+            case ["program", *statements]: return self._compile_statements(statements)
+
+    def _compile_statements(self, statements):
+        compiled = tuple(self._compile_statement(statement) for statement in statements)
+        match compiled:
+            case (): return lambda frame: None
+            case (statement,): return statement
+
+        def run(frame):
+            for statement in compiled:
+                if (ret := statement(frame)) is not None: return ret
+        return run
+
+    def _compile_statement(self, statement):
+        match statement:
+            case ["scope", names, cells, *statements]: return self._compile_scope(names, cells, statements)
+            case ["seq", *statements]: return self._compile_statements(statements)
+            case ["define", slot, value]: return self._compile_define(slot, value)
+            case ["cell_define", slot, value]: return self._compile_cell_define(slot, value)
+            case ["var", name, value]: return self._compile_var(name, value)
+            case ["assign", depth, slot, value]: return self._compile_assign(depth, slot, value)
+            case ["cell_assign", depth, slot, value]: return self._compile_cell_assign(depth, slot, value)
+            case ["free_assign", depth, index, value]: return self._compile_free_assign(depth, index, None, value)
+            case ["checked_free_assign", depth, index, name, value]:
+                return self._compile_free_assign(depth, index, name, value)
+            case ["set", name, value]: return self._compile_set(name, value)
+            case ["if", cond, conseq, alt]: return self._compile_if(cond, conseq, alt)
+            case ["while", cond, body]: return self._compile_while(cond, body)
+            case ["return", value]: return self._compile_return(value)
+            case ["print", expr]: return self._compile_print(expr)
+            case ["expr", expr]: return self._compile_expr_statement(expr)
+            case ["[]=", target, index, value]: return self._compile_set_index(target, index, value)
+            case unexpected: assert False, f"Internal Error at `{unexpected}`."
+
+    def _compile_scope(self, names, cells, statements):
+        names = tuple(names)
+        padding = (UNDEFINED,) * len(names)
+        body = self._compile_statements(statements)
+        if not cells: return lambda frame: body([frame, names, *padding])
+
+        def run(frame):
+            frame = [frame, names, *padding]
+            for slot in cells: frame[slot] = Cell(UNDEFINED)
+            return body(frame)
+        return run
+
+    def _compile_define(self, slot, value):
+        value = self._compile_expr(value)
+
+        def run(frame): frame[slot] = value(frame)
+        return run
+
+    def _compile_cell_define(self, slot, value):
+        value = self._compile_expr(value)
+
+        def run(frame): frame[slot].value = value(frame)
+        return run
+
+    def _compile_var(self, name, value):
+        define = self._global_env.define
+        value = self._compile_expr(value)
+        return lambda frame: define(name, value(frame))
+
+    def _compile_assign(self, depth, slot, value):
+        value = self._compile_assigned(["local", depth, slot], value)
+
+        def run(frame):
+            v = value(frame)
+            for _ in range(depth): frame = frame[0]
+            frame[slot] = v
+        return run
+
+    def _compile_cell_assign(self, depth, slot, value):
+        value = self._compile_assigned(["cell", depth, slot], value)
+
+        def run(frame):
+            v = value(frame)
+            for _ in range(depth): frame = frame[0]
+            frame[slot].value = v
+        return run
+
+    def _compile_free_assign(self, depth, index, name, value):
+        value = self._compile_assigned(["free", depth, index], value)
+
+        def run(frame):
+            v = value(frame)
+            for _ in range(depth): frame = frame[0]
+            cell = frame[0][index]
+            assert name is None or cell.value is not UNDEFINED, f"`{name}` not defined."
+            cell.value = v
+        return run
+
+    def _compile_assigned(self, target, value):
+        value = self._compile_expr(value)
+        if not self._check_missing: return value
+        get = self._compile_expr(target)
+
+        def checked(frame):
+            v = value(frame)
+            get(frame)
+            return v
+        return checked
+
+    def _compile_set(self, name, value):
+        assign = self._global_env.assign
+        value = self._compile_expr(value)
+        return lambda frame: assign(name, value(frame))
+
+    def _compile_if(self, cond, conseq, alt):
+        cond = self._compile_expr(cond)
+        conseq = self._compile_statement(conseq)
+        alt = self._compile_statement(alt)
+        return lambda frame: conseq(frame) if cond(frame) else alt(frame)
+
+    def _compile_while(self, cond, body):
+        cond = self._compile_expr(cond)
+        body = self._compile_statement(body)
+
+        def run(frame):
+            while cond(frame):
+                if (ret := body(frame)) is not None: return ret
+        return run
+
+    def _compile_return(self, value):
+        match value:
+            case ["call", "less", _, _]: pass
+            case ["call", func, *args]: return self._compile_tail_call(func, args)
+        value = self._compile_expr(value)
+        return lambda frame: (value(frame),)
+
+    def _compile_tail_call(self, func, args):
+        evaluator = self._evaluator
+        func = self._compile_expr(func)
+        args = tuple(self._compile_expr(arg) for arg in args)
+
+        def call(frame):
+            f = func(frame)
+            values = [arg(frame) for arg in args]
+            if callable(f):
+                evaluator._env = frame
+                return (f(*values),)
+            return TailCall(f, values)
+        return call
+
+    def _compile_print(self, expr):
+        evaluator = self._evaluator
+        expr = self._compile_expr(expr)
+
+        def run(frame): evaluator.output.append(evaluator._to_print(expr(frame)))
+        return run
+
+    def _compile_set_index(self, target, index, value):
+        target, index, value = self._compile_expr(target), self._compile_expr(index), self._compile_expr(value)
+
+        def run(frame): array_store(target(frame), index(frame), value(frame))
+        return run
+
+    def _compile_expr_statement(self, expr):
+        expr = self._compile_expr(expr)
+
+        def run(frame): expr(frame)
+        return run
+
+    def _compile_expr(self, expr):
+        match expr:
+            case int(value) | bool(value): return lambda frame: value
+            case str(name): return self._compile_global(name)
+            case ["local", depth, slot]: return self._check(self._compile_local(depth, slot))
+            case ["cell", depth, slot]: return self._check(self._compile_cell(depth, slot))
+            case ["free", depth, index]: return self._check(self._compile_free(depth, index))
+            case ["checked_free", depth, index, name]: return self._check(self._compile_checked_free(depth, index, name))
+            case ["func", params, names, cells, free, body]: return self._compile_func(params, names, cells, free, body)
+            case [str(op), a, b] if op in PRECEDENCE:
+                return self._compile_binop(op, self._compile_expr(a), self._compile_expr(b))
+            case ["[...]", *elements]:
+                elements = tuple(self._compile_expr(element) for element in elements)
+                return lambda frame: make_array([element(frame) for element in elements])
+            case ["[]", target, index]:
+                target, index = self._compile_expr(target), self._compile_expr(index)
+                return lambda frame: array_index(target(frame), index(frame))
+            case ["call", "less", a, b]: return self._compile_less(a, b)
+            case ["call", func, *args]: return self._compile_call(func, args)
+            case unexpected: assert False, f"Internal Error at `{unexpected}`."
+
+    def _compile_global(self, name):
+        values = self._globals
+
+        def get(frame):
+            try: return values[name]
+            except KeyError: assert False, f"`{name}` not defined."
+        return get
+
+    def _check(self, get):
+        if not self._check_missing: return get
+
+        def checked(frame):
+            assert (value := get(frame)).__class__ is not Missing, f"`{value.name}` not defined."
+            return value
+        return checked
+
+    def _compile_local(self, depth, slot):
+        match depth:
+            case 0: return lambda frame: frame[slot]
+            case 1: return lambda frame: frame[0][slot]
+            case 2: return lambda frame: frame[0][0][slot]
+
+        def get(frame):
+            for _ in range(depth): frame = frame[0]
+            return frame[slot]
+        return get
+
+    def _compile_cell(self, depth, slot):
+        match depth:
+            case 0: return lambda frame: frame[slot].value
+            case 1: return lambda frame: frame[0][slot].value
+
+        def get(frame):
+            for _ in range(depth): frame = frame[0]
+            return frame[slot].value
+        return get
+
+    def _compile_free(self, depth, index):
+        match depth:
+            case 0: return lambda frame: frame[0][index].value
+            case 1: return lambda frame: frame[0][0][index].value
+
+        def get(frame):
+            for _ in range(depth): frame = frame[0]
+            return frame[0][index].value
+        return get
+
+    def _compile_checked_free(self, depth, index, name):
+        def get(frame):
+            for _ in range(depth): frame = frame[0]
+            assert (value := frame[0][index].value) is not UNDEFINED, f"`{name}` not defined."
+            return value
+        return get
+
+    def _compile_capture(self, source):
+        match source:
+            case ["cell", depth, slot]:
+                def get(frame):
+                    for _ in range(depth): frame = frame[0]
+                    return frame[slot]
+            case ["free", depth, index]:
+                def get(frame):
+                    for _ in range(depth): frame = frame[0]
+                    return frame[0][index]
+        return get
+
+    def _compile_func(self, params, names, cells, free, body):
+        names = tuple(names)
+        arity = len(params)
+        padding = (UNDEFINED,) * (len(names) - arity)
+        cells = tuple(cells)
+        run = self._compile_statement(body)
+        checked = run if self._check_missing else None
+
+        def enter(captured, args, body=run):
+            if len(args) != arity: return enter_mismatched(captured, args)
+            frame = [captured, names, *args, *padding]
+            for slot in cells: frame[slot] = Cell(frame[slot])
+            return body(frame)
+
+        def enter_mismatched(captured, args):
+            nonlocal checked
+            if len(args) > arity: return enter(captured, args[:arity])
+            if checked is None: checked = self._compile_checked(body)
+            return enter(captured, [*args, *map(Missing, params[len(args):])], checked)
+
+        if not free: return lambda frame: Closure(params, enter, ())
+        captures = tuple(self._compile_capture(source) for source in free)
+        return lambda frame: Closure(params, enter, tuple(capture(frame) for capture in captures))
+
+    def _compile_checked(self, body):
+        self._check_missing = True
+        try: return self._compile_statement(body)
+        finally: self._check_missing = False
+
+    def _compile_binop(self, op, a, b):
+        match op:
+            case "^": return lambda frame: a(frame) ** b(frame)
+            case "*": return lambda frame: a(frame) * b(frame)
+            case "/":
+                div = self._evaluator._div
+                return lambda frame: div(a(frame), b(frame))
+            case "+": return lambda frame: a(frame) + b(frame)
+            case "-": return lambda frame: a(frame) - b(frame)
+            case "=": return lambda frame: a(frame) == b(frame)
+            case "#": return lambda frame: a(frame) != b(frame)
+            case "<": return lambda frame: a(frame) < b(frame)
+            case ">": return lambda frame: a(frame) > b(frame)
+            case "<=": return lambda frame: a(frame) <= b(frame)
+            case ">=": return lambda frame: a(frame) >= b(frame)
+            case "and": return lambda frame: a(frame) and b(frame)
+            case "or": return lambda frame: a(frame) or b(frame)
+
+    def _compile_less(self, a, b):
+        values, less, call = self._globals, self._evaluator._less, self._compile_call("less", [a, b])
+        a, b = self._compile_expr(a), self._compile_expr(b)
+        return lambda frame: a(frame) < b(frame) if values["less"] is less else call(frame)
+
+    def _compile_call(self, func, args):
+        evaluator = self._evaluator
+        func = self._compile_expr(func)
+        args = tuple(self._compile_expr(arg) for arg in args)
+
+        def call(frame):
+            f = func(frame)
+            values = [arg(frame) for arg in args]
+            if callable(f):
+                evaluator._env = frame
+                return f(*values)
+            while True:
+                ret = f.body(f.env, values)
+                if ret is None: return 0
+                if ret.__class__ is tuple: return ret[0]
+                f, values = ret.func, ret.args
+        return call
+
+class ClosureEvaluator(Evaluator):
+    def __init__(self, sink=None):
+        super().__init__(sink=sink)
+        self._compiler = ClosureCompiler(self, self._env)
+
+    def eval_program(self, program):
+        self._reset_output()
+        self._execute(program)
+
+    def eval_statements(self, statements):
+        for statement in statements:
+            self._reset_output()
+            stopped = self._execute(["program", to_list(statement)], check_globals=False)
+            yield from self._printed()
+            if stopped: break
+
+    def _execute(self, program, check_globals=True):
+        global_env = self._env
+        run = self._compiler.compile_program(to_list(program), check_globals)
+        try:
+            stopped = (ret := run(global_env)) is not None
+            while isinstance(ret, TailCall): ret = ret.func.body(ret.func.env, ret.args)
+        except RecursionError: assert False, "Call depth limit exceeded."
+        finally:
+            self._env = global_env
+            self._flush_output()
+        return stopped
+
+    def _print_env(self):
+        frames = []
+        frame = self._env
+        while isinstance(frame, list):
+            values = (value.value if isinstance(value, Cell) else value for value in frame[FIRST_SLOT:])
+            frames.insert(0, { name: value for name, value in zip(frame[1], values) if value is not UNDEFINED })
+            frame = frame[0]
+        for values in self._compiler._global_env.list() + frames:
+            print({ k: self._to_print(v) for k, v in values.items() })
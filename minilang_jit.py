@@ -0,0 +1,140 @@
+from minilang import Returned, TailCall, array_index, array_store, make_array, to_list
+from minilang_resolver import FIRST_SLOT, Resolver
+
+HOT_CALLS = 64
+UNDEFINED = object()
+
+class Unsupported(Exception):
+    pass
+
+def _tail(func, args):
+    return func(*args) if callable(func) else TailCall(func, args)
+
+class Transpiler:
+    def __init__(self):
+        self._lines = []
+        self._frames = []
+        self._count = 0
+
+    def transpile(self, params, names, body):
+        self._emit(0, "def run(env, args):")
+        frame = self._frame(names)
+        for i, name in enumerate(frame[FIRST_SLOT:]):
+            self._emit(1, f"{name} = args[{i}]" if i < len(params) else f"{name} = UNDEFINED")
+        self._statement(body, 1)
+        self._frames.pop()
+        return "\n".join(self._lines)
+
+    def _frame(self, names):
+        frame = [None] * FIRST_SLOT
+        for name in names:
+            self._count += 1
+            frame.append(f"v{self._count}")
+        self._frames.append(frame)
+        return frame
+
+    def _emit(self, indent, line):
+        self._lines.append("    " * indent + line)
+
+    def _body(self, statement, indent):
+        start = len(self._lines)
+        self._statement(statement, indent)
+        if len(self._lines) == start: self._emit(indent, "pass")
+
+    def _statement(self, statement, indent):
+        match statement:
+            case ["scope", names, [], *statements]:
+                self._emit(indent, f"{' = '.join(self._frame(names)[FIRST_SLOT:])} = UNDEFINED")
+                for statement in statements: self._statement(statement, indent)
+                self._frames.pop()
+            case ["seq", *statements]:
+                for statement in statements: self._statement(statement, indent)
+            case ["define", slot, value]: self._emit(indent, f"{self._frames[-1][slot]} = {self._expr(value)}")
+            case ["assign", depth, slot, value]:
+                self._emit(indent, f"{self._frames[-1 - depth][slot]} = {self._expr(value)}")
+            case ["set", name, value]: self._emit(indent, f"env.assign({name!r}, {self._expr(value)})")
+            case ["if", cond, conseq, alt]:
+                self._emit(indent, f"if {self._expr(cond)}:")
+                self._body(conseq, indent + 1)
+                self._emit(indent, "else:")
+                self._body(alt, indent + 1)
+            case ["while", cond, body]:
+                self._emit(indent, f"while {self._expr(cond)}:")
+                self._body(body, indent + 1)
+            case ["return", ["call", "less", _, _] as value]: self._emit(indent, f"return Returned({self._expr(value)})")
+            case ["return", ["call", func, *args]]:
+                self._emit(indent, f"return Returned(tail({self._expr(func)}, [{self._exprs(args)}]))")
+            case ["return", value]: self._emit(indent, f"return Returned({self._expr(value)})")
+            case ["print", expr]: self._emit(indent, f"evaluator.output.append(to_print({self._expr(expr)}))")
+            case ["expr", expr]: self._emit(indent, self._expr(expr))
+            case ["[]=", target, index, value]:
+                self._emit(indent, f"array_store({self._expr(target)}, {self._expr(index)}, {self._expr(value)})")
+            case _: raise Unsupported()
+
+    def _expr(self, expr):
+        match expr:
+            case bool(value) | int(value): return repr(value)
+            case "print_env": raise Unsupported()
+            case str(name): return f"env.get({name!r})"
+            case ["local", depth, slot]: return self._frames[-1 - depth][slot]
+            case ["^", a, b]: return f"({self._expr(a)} ** {self._expr(b)})"
+            case ["*", a, b]: return f"({self._expr(a)} * {self._expr(b)})"
+            case ["/", a, b]: return f"div({self._expr(a)}, {self._expr(b)})"
+            case ["+", a, b]: return f"({self._expr(a)} + {self._expr(b)})"
+            case ["-", a, b]: return f"({self._expr(a)} - {self._expr(b)})"
+            case ["=", a, b]: return f"({self._expr(a)} == {self._expr(b)})"
+            case ["#", a, b]: return f"({self._expr(a)} != {self._expr(b)})"
+            case ["<" | ">" | "<=" | ">=" | "and" | "or" as op, a, b]: return f"({self._expr(a)} {op} {self._expr(b)})"
+            case ["[...]", *elements]: return f"make_array([{self._exprs(elements)}])"
+            case ["[]", target, index]: return f"array_index({self._expr(target)}, {self._expr(index)})"
+            case ["call", "less", a, b]:
+                a, b = self._expr(a), self._expr(b)
+                return f"({a} < {b} if (less := env.get('less')) is LESS else evaluator._apply(less, [{a}, {b}]))"
+            case ["call", func, *args]: return f"evaluator._apply({self._expr(func)}, [{self._exprs(args)}])"
+            case _: raise Unsupported()
+
+    def _exprs(self, exprs):
+        return ", ".join(self._expr(expr) for expr in exprs)
+
+class Jit:
+    def __init__(self, evaluator, threshold=HOT_CALLS):
+        assert not evaluator._limited, "JIT cannot be combined with limits."
+        self.threshold = threshold
+        self._evaluator = evaluator
+        self._invoke_interpreted = evaluator._invoke
+        self._namespace = { "Returned": Returned, "UNDEFINED": UNDEFINED, "tail": _tail, "evaluator": evaluator,
+                            "div": evaluator._div, "to_print": evaluator._to_print,
+                            "LESS": evaluator._env.get("less"), "make_array": make_array,
+                            "array_index": array_index, "array_store": array_store }
+        self._calls = {}
+        self._code = {}
+        self._sources = {}
+        evaluator._invoke = self._invoke
+
+    def stats(self):
+        return { "compiled": sum(1 for run in self._code.values() if run),
+                 "rejected": sum(1 for run in self._code.values() if not run) }
+
+    def source(self, func):
+        return self._sources.get(func.body)
+
+    def _invoke(self, func, args):
+        if (run := self._code.get(func.body)) is None:
+            calls = self._calls[func.body] = self._calls.get(func.body, 0) + 1
+            if calls < self.threshold: return self._invoke_interpreted(func, args)
+            run = self._code[func.body] = self._compile(func)
+        if run and len(args) == len(func.params): return run(func.env, args)
+        return self._invoke_interpreted(func, args)
+
+    def _compile(self, func):
+        program = ["program", ["expr", ["func", list(func.params), to_list(func.body)]]]
+        try:
+            match Resolver(check_globals=False).resolve(program):
+                case ["program", ["expr", ["func", params, names, [], [], body]]]:
+                    source = Transpiler().transpile(params, names, body)
+                case _: return False
+            namespace = dict(self._namespace)
+            exec(compile(source, "<jit>", "exec"), namespace)
+        except (Unsupported, AssertionError, RecursionError, SyntaxError): return False
+        self._sources[func.body] = source
+        return namespace["run"]
@@ -0,0 +1,134 @@
+import weakref
+from collections import OrderedDict
+from functools import lru_cache
+
+from minilang import (Array, Binary, Block, Call, Closure, Const, Expr, Func, If, Index, Print, Return, Seq, Set,
+                      SetIndex, Var, Variable, While)
+
+MAX_FUNCTIONS = 1 << 10
+
+class Purity:
+    def __init__(self, params, body, effects_only=False):
+        self.free_names = set()
+        self.called_names = set()
+        self._effects_only = effects_only
+        self._scopes = [set(params)]
+        self.pure = self._statement(body)
+
+    def _statement(self, statement):
+        match statement:
+            case Block(statements):
+                self._scopes.append(set())
+                pure = all(self._statement(statement) for statement in statements)
+                self._scopes.pop()
+                return pure
+            case Seq(statements): return all(self._statement(statement) for statement in statements)
+            case Var(name, value):
+                pure = self._expr(value)
+                self._scopes[-1].add(name)
+                return pure
+            case Set(name, value): return self._is_local(name) and self._expr(value)
+            case If(cond, conseq, alt): return self._expr(cond) and self._statement(conseq) and self._statement(alt)
+            case While(cond, body): return self._expr(cond) and self._statement(body)
+            case Return(expr) | Expr(expr): return self._expr(expr)
+            case Print() | SetIndex(): return False
+            case unexpected: assert False, f"Internal Error at `{unexpected}`."
+
+    def _expr(self, expr):
+        match expr:
+            case Const(): return True
+            case Variable(name):
+                if not self._is_local(name): self.free_names.add(name)
+                return True
+            case Binary(a, b): return self._expr(a) and self._expr(b)
+            case Call(Variable(name), args) if not self._is_local(name):
+                self.called_names.add(name)
+                return self._expr(Variable(name)) and all(self._expr(arg) for arg in args)
+            case Array(elements) if self._effects_only: return all(self._expr(element) for element in elements)
+            case Index(target, index) if self._effects_only: return self._expr(target) and self._expr(index)
+            case Func() if self._effects_only: return True
+            case Call() | Func() | Array() | Index(): return False
+            case unexpected: assert False, f"Internal Error at `{unexpected}`."
+
+    def _is_local(self, name):
+        return any(name in scope for scope in self._scopes)
+
+class Memoizer:
+    def __init__(self, evaluator, size=128):
+        self.size = size
+        self._evaluator = evaluator
+        self._apply_uncached = evaluator._apply
+        self._pure_builtins = { evaluator._env.get("less") }
+        self._purity = {}
+        self._memos = OrderedDict()
+        self._forced = weakref.WeakKeyDictionary()
+        evaluator._apply = self._apply
+        evaluator._env.define("memo", self._force(True))
+        evaluator._env.define("nomemo", self._force(False))
+        evaluator._env.define("memo_stats", self._print_stats)
+
+    def stats(self, func):
+        if isinstance(func, str): func = self._evaluator._env.get(func)
+        if not (memo := self._memos.get(func)): return None
+        info = memo[0].cache_info()
+        return { "hits": info.hits, "misses": info.misses, "size": info.currsize }
+
+    def _apply(self, func, args):
+        if func.__class__ is Closure:
+            if (memo := self._memos.get(func)) is None: memo = self._memoize(func)
+            else: self._memos.move_to_end(func)
+            if memo and not any(arg.__class__ is memoryview for arg in args):
+                cached, deps = memo
+                if all(env.get(name) is value for env, name, value in deps): return cached(*args)
+                del self._memos[func]
+                return self._apply(func, args)
+        return self._apply_uncached(func, args)
+
+    def _memoize(self, func):
+        match self._forced.get(func):
+            case True: memo = self._cache(func, ())
+            case False: memo = False
+            case None:
+                deps = self._dependencies(func, set())
+                memo = False if deps is None else self._cache(func, deps)
+        self._memos[func] = memo
+        if len(self._memos) > MAX_FUNCTIONS: self._memos.popitem(last=False)
+        return memo
+
+    def _cache(self, func, deps):
+        apply = self._apply_uncached
+        return (lru_cache(maxsize=self.size, typed=True)(lambda *args: apply(func, list(args))), deps)
+
+    def _dependencies(self, func, visiting):
+        match self._forced.get(func):
+            case True: return ()
+            case False: return None
+        if func in visiting: return ()
+        visiting.add(func)
+        if (purity := self._purity.get(func.body)) is None:
+            purity = self._purity[func.body] = Purity(func.params, func.body)
+        if not purity.pure: return None
+        deps = []
+        for name in purity.free_names:
+            try: value = func.env.get(name)
+            except AssertionError: return None
+            if value.__class__ is memoryview: return None
+            if callable(value):
+                if value not in self._pure_builtins: return None
+            elif value.__class__ is Closure and name in purity.called_names:
+                if (callee_deps := self._dependencies(value, visiting)) is None: return None
+                deps += callee_deps
+            elif name in purity.called_names: return None
+            deps.append((func.env, name, value))
+        return tuple(deps)
+
+    def _force(self, enabled):
+        def force(func):
+            assert func.__class__ is Closure, f"`{self._evaluator._to_print(func)}` is not a function."
+            self._forced[func] = enabled
+            self._memos.pop(func, None)
+            return func
+        return force
+
+    def _print_stats(self, func):
+        print(self.stats(func))
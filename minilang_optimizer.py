@@ -0,0 +1,93 @@
+from minilang import PRECEDENCE, Located
+
+MAX_FOLD_BITS = 1 << 12
+
+class Optimizer:
+    def __init__(self, max_int_bits=None):
+        self._max_bits = MAX_FOLD_BITS if max_int_bits is None else min(MAX_FOLD_BITS, max_int_bits)
+        self.stats = { "folded": 0, "pruned_branches": 0, "removed_loops": 0, "elided_scopes": 0 }
+
+    def optimize(self, program):
+        match program:
+            case ["program", *statements]: return ["program", *self.optimize_statements(statements)]
+            case unexpected: assert False, f"Internal Error at `{unexpected}`."
+
+    def optimize_statements(self, statements):
+        for statement in statements:
+            match self._optimize_statement(statement):
+                case ["seq", *statements]: yield from statements
+                case optimized: yield optimized
+
+    def _optimize_statement(self, statement):
+        optimized = self._optimize_bare_statement(statement)
+        if statement.__class__ is not Located or optimized.__class__ is Located: return optimized
+        return Located(optimized, statement.pos)
+
+    def _optimize_bare_statement(self, statement):
+        match statement:
+            case ["block", *statements]: return self._optimize_block(statements)
+            case ["seq", *statements]: return ["seq", *self.optimize_statements(statements)]
+            case ["var" | "set" as op, name, value]: return [op, name, self._optimize_expr(value)]
+            case ["if", cond, conseq, alt]: return self._optimize_if(cond, conseq, alt)
+            case ["while", cond, body]: return self._optimize_while(cond, body)
+            case ["return" | "print" | "expr" as op, expr]: return [op, self._optimize_expr(expr)]
+            case ["[]=", target, index, value]:
+                return ["[]=", self._optimize_expr(target), self._optimize_expr(index), self._optimize_expr(value)]
+            case unexpected: assert False, f"Internal Error at `{unexpected}`."
+
+    def _optimize_block(self, statements):
+        statements = list(self.optimize_statements(statements))
+        if any(statement[0] == "var" for statement in statements): return ["block", *statements]
+        self.stats["elided_scopes"] += 1
+        return ["seq", *statements]
+
+    def _optimize_if(self, cond, conseq, alt):
+        cond = self._optimize_expr(cond)
+        if not isinstance(cond, int):
+            return ["if", cond, self._optimize_statement(conseq), self._optimize_statement(alt)]
+        self.stats["pruned_branches"] += 1
+        return self._optimize_statement(conseq if cond else alt)
+
+    def _optimize_while(self, cond, body):
+        cond = self._optimize_expr(cond)
+        if isinstance(cond, int) and not cond:
+            self.stats["removed_loops"] += 1
+            return ["seq"]
+        return ["while", cond, self._optimize_statement(body)]
+
+    def _optimize_expr(self, expr):
+        match expr:
+            case ["func", params, body]: return ["func", params, self._optimize_statement(body)]
+            case ["and" | "or" as op, a, b]:
+                a, b = self._optimize_expr(a), self._optimize_expr(b)
+                if not isinstance(a, int): return [op, a, b]
+                self.stats["folded"] += 1
+                return b if bool(a) == (op == "and") else a
+            case [str(op), a, b] if op in PRECEDENCE:
+                a, b = self._optimize_expr(a), self._optimize_expr(b)
+                if isinstance(a, int) and isinstance(b, int) and (value := self._fold(op, a, b)) is not None:
+                    self.stats["folded"] += 1
+                    return value
+                return [op, a, b]
+            case [func, *args]: return [self._optimize_expr(func), *[self._optimize_expr(arg) for arg in args]]
+            case _: return expr
+
+    def _fold(self, op, a, b):
+        match op:
+            case "^":
+                if b < 0 or (abs(a).bit_length() - 1) * b >= self._max_bits: return None
+                value = a ** b
+            case "*": value = a * b
+            case "/":
+                if b == 0: return None
+                value = a // b
+            case "+": value = a + b
+            case "-": value = a - b
+            case "=": value = a == b
+            case "#": value = a != b
+            case "<": value = a < b
+            case ">": value = a > b
+            case "<=": value = a <= b
+            case ">=": value = a >= b
+        if type(value) not in (int, bool) or value.bit_length() > self._max_bits: return None
+        return value
@@ -0,0 +1,52 @@
+import io
+import os
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+
+from minilang import Closure, compact, make_array
+from minilang_closure import ClosureEvaluator
+from minilang_memo import Purity
+from minilang_snapshot import dump, load
+from minilang_vm import Code
+
+CHUNKS_PER_WORKER = 4
+PURE_BUILTINS = ("less", "array", "array_len", "array_sum", "array_add", "array_mul", "array_slice")
+
+_worker = None
+_func = None
+
+def pmap(evaluator, func, n, workers=None):
+    assert func.__class__ is Closure, "`pmap` expects a function."
+    assert n.__class__ is int and n >= 0, "`pmap` expects a non-negative count."
+    assert not isinstance(evaluator, ClosureEvaluator), "`pmap` is not supported by the closure engine."
+    assert not evaluator._limited, "`pmap` cannot be combined with limits."
+    _check_pure(evaluator, func, set())
+    results = array("q")
+    workers = workers or os.cpu_count() or 1
+    if n:
+        payload = io.BytesIO()
+        dump(evaluator, payload, func)
+        with ProcessPoolExecutor(workers, initializer=_init, initargs=(type(evaluator), payload.getvalue())) as pool:
+            size = max(1, n // (workers * CHUNKS_PER_WORKER))
+            starts = range(0, n, size)
+            for chunk in pool.map(_run, starts, [min(start + size, n) for start in starts]): results += chunk
+    return memoryview(results)
+
+def _check_pure(evaluator, func, checked):
+    if func in checked: return
+    checked.add(func)
+    body = compact(func.body.source) if func.body.__class__ is Code else func.body
+    assert (purity := Purity(func.params, body, effects_only=True)).pure, "`pmap` expects a pure function."
+    for name in purity.called_names:
+        callee = func.env.get(name)
+        if callee.__class__ is Closure: _check_pure(evaluator, callee, checked)
+        elif callable(callee):
+            assert any(callee is evaluator._globals.get(pure) for pure in PURE_BUILTINS), \
+                   f"`pmap` cannot call the builtin `{name}`."
+
+def _init(engine, payload):
+    global _worker, _func
+    _worker, _func = load(io.BytesIO(payload), engine())
+
+def _run(start, stop):
+    return make_array([_worker._apply(_func, [i]) for i in range(start, stop)]).obj
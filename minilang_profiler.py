@@ -0,0 +1,104 @@
+from collections import Counter
+from time import perf_counter
+
+from minilang import BLOCK, EXPR, FUNC, IF, PRINT, RETURN, SEQ, SET, VAR, WHILE
+
+STATEMENT_OPS = (BLOCK, SEQ, VAR, SET, IF, WHILE, RETURN, PRINT, EXPR)
+
+class FunctionStats:
+    __slots__ = ("calls", "inclusive", "exclusive")
+
+    def __init__(self):
+        self.calls = 0
+        self.inclusive = 0.0
+        self.exclusive = 0.0
+
+class Profiler:
+    def __init__(self, evaluator):
+        self.functions = {}
+        self.stacks = Counter()
+        self._evaluator = evaluator
+        self._hits = Counter()
+        self._names = {}
+        self._frames = []
+        self._active = Counter()
+        self.start()
+
+    def __enter__(self): return self
+    def __exit__(self, *exc_info): self.stop()
+
+    def start(self):
+        evaluator = self._evaluator
+        self._saved = { name: vars(evaluator)[name] for name in ("_DISPATCH", "_invoke") if name in vars(evaluator) }
+        dispatch = dict(evaluator._DISPATCH)
+        for op in (VAR, SET): dispatch[op] = self._name_functions(dispatch[op])
+        for op in STATEMENT_OPS: dispatch[op] = self._count_hits(dispatch[op])
+        evaluator._DISPATCH = dispatch
+        evaluator._invoke = self._timed_invoke(evaluator._invoke)
+
+    def stop(self):
+        for name in ("_DISPATCH", "_invoke"): vars(self._evaluator).pop(name, None)
+        vars(self._evaluator).update(self._saved)
+
+    def statement_hits(self):
+        hits = Counter()
+        for node, count in self._hits.items():
+            if node.pos is not None: hits[node.pos] += count
+        return hits
+
+    def table(self):
+        lines = [f"{'function':<24} {'calls':>10} {'inclusive(ms)':>14} {'exclusive(ms)':>14}"]
+        for name, stats in sorted(self.functions.items(), key=lambda item: -item[1].exclusive):
+            lines.append(f"{name:<24} {stats.calls:>10} {stats.inclusive * 1000:>14.3f} {stats.exclusive * 1000:>14.3f}")
+        lines.append("")
+        lines.append(f"{'line:column':<24} {'hits':>10}")
+        for (line, column), count in sorted(self.statement_hits().items()):
+            lines.append(f"{f'{line}:{column}':<24} {count:>10}")
+        return "\n".join(lines)
+
+    def collapsed(self):
+        return "\n".join(f"{';'.join(('<main>', *stack))} {round(seconds * 1_000_000)}"
+                         for stack, seconds in sorted(self.stacks.items()))
+
+    def _count_hits(self, handler):
+        hits = self._hits
+
+        def count(evaluator, node):
+            hits[node] += 1
+            return handler(evaluator, node)
+        return count
+
+    def _name_functions(self, handler):
+        names = self._names
+
+        def name(evaluator, node):
+            if node.value.op == FUNC: names.setdefault(node.value.body, node.name)
+            return handler(evaluator, node)
+        return name
+
+    def _timed_invoke(self, invoke):
+        frames, active = self._frames, self._active
+
+        def timed(func, args):
+            name = self._function_name(func.body)
+            frames.append([name, 0.0])
+            active[name] += 1
+            start = perf_counter()
+            try: return invoke(func, args)
+            finally:
+                elapsed = perf_counter() - start
+                stack = tuple(frame[0] for frame in frames)
+                _, children = frames.pop()
+                active[name] -= 1
+                if frames: frames[-1][1] += elapsed
+                stats = self.functions.get(name) or self.functions.setdefault(name, FunctionStats())
+                stats.calls += 1
+                stats.exclusive += elapsed - children
+                if not active[name]: stats.inclusive += elapsed
+                self.stacks[stack] += elapsed - children
+        return timed
+
+    def _function_name(self, body):
+        if (name := self._names.get(body)) is not None: return name
+        position = "?" if body.pos is None else f"{body.pos[0]}:{body.pos[1]}"
+        return self._names.setdefault(body, f"<func {position}>")
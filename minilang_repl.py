@@ -0,0 +1,105 @@
+import sys
+import time
+import tracemalloc
+from functools import lru_cache
+
+from minilang import Parser, Scanner, compact
+
+PARSE_CACHE_SIZE = 1 << 10
+COMPOUND = ("{", "if", "while", "def")
+
+def split_statements(source, final=False):
+    scanner = Scanner(source)
+    values, offsets = scanner.values, scanner.offsets
+    statements = []
+    start = depth = 0
+    first = None
+    for i in range(len(values) - 1):
+        token = values[i]
+        if first is None: first, start = token, offsets[i]
+        if token == "{" or token == "(" or token == "[": depth += 1
+        elif token == "}" or token == ")" or token == "]": depth -= 1
+        if depth > 0: continue
+        if token == "}" and first in COMPOUND:
+            if first == "if" and values[i + 1] in ("elif", "else"): continue
+            if first == "if" and i + 1 == len(values) - 1 and not final: break
+        elif token != ";": continue
+        statements.append(source[start:offsets[i] + 1])
+        first = None
+    rest = "" if first is None else source[start:]
+    return statements, rest
+
+class Repl:
+    def __init__(self, evaluator, optimizer=None, echo_ast=True, track_positions=False, out=sys.stdout):
+        self.echo_ast = echo_ast
+        self.timing = False
+        self.memory = False
+        self._evaluator = evaluator
+        self._optimizer = optimizer
+        self._track_positions = track_positions
+        self._out = out
+        self._buffer = ""
+        self.parse = lru_cache(PARSE_CACHE_SIZE)(self._parse)
+
+    def run(self):
+        while True:
+            try: line = input("... " if self._buffer else ">>> ")
+            except EOFError: break
+            except KeyboardInterrupt:
+                self._buffer = ""
+                self._print()
+                continue
+            self.feed(line)
+        if self._buffer.strip(): self.feed("")
+
+    def feed(self, line):
+        if not self._buffer and line.startswith(":"): return self._command(line.strip())
+        texts, self._buffer = split_statements(self._buffer + line + "\n", final=not line.strip())
+        if not texts: return
+        start, peak = time.perf_counter(), None
+        if self.memory: tracemalloc.start()
+        try:
+            for text in texts:
+                if not self._eval(text): break
+            if self.memory: peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            if self.memory: tracemalloc.stop()
+        if self.timing: self._print(f"time: {(time.perf_counter() - start) * 1000:.3f} ms")
+        if peak is not None: self._print(f"mem: peak {peak / 1024:.1f} KiB")
+
+    def _eval(self, text):
+        try: ast, statements = self.parse(text.strip())
+        except AssertionError as e:
+            self._print(e)
+            return False
+        if self.echo_ast:
+            for statement in ast: self._print(statement)
+        try:
+            for value in self._evaluator.eval_statements(statements): self._print(value)
+        except AssertionError as e:
+            self._print("Error:", e)
+            return False
+        return True
+
+    def _parse(self, text):
+        parser = Parser(text, track_positions=self._track_positions)
+        try: ast = parser.parse_program()[1:]
+        except AssertionError as e:
+            line, column = parser.position()
+            assert False, f"Error at line {line}, column {column}: {e}"
+        if self._optimizer is not None: ast = list(self._optimizer.optimize_statements(ast))
+        return ast, tuple(compact(statement) for statement in ast)
+
+    def _command(self, command):
+        match command:
+            case ":ast": self.echo_ast = not self.echo_ast
+            case ":time": self.timing = not self.timing
+            case ":mem": self.memory = not self.memory
+            case _:
+                self._print(f"Unknown command `{command}`.")
+                return
+        state = { ":ast": self.echo_ast, ":time": self.timing, ":mem": self.memory }[command]
+        self._print(f"{command[1:]}: {'on' if state else 'off'}")
+
+    def _print(self, *values):
+        print(*values, file=self._out)
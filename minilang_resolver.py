@@ -0,0 +1,175 @@
+from minilang import PRECEDENCE
+
+FIRST_SLOT = 2
+
+CELL_FORMS = { "local": "cell", "define": "cell_define", "assign": "cell_assign" }
+
+class Scope:
+    def __init__(self, func=None):
+        self.names = []
+        self.cells = []
+        self.func = func
+        self._declared = {}
+
+    def declare(self, name, seq):
+        assert name not in self._declared, f"`{name}` already defined."
+        self._declared[name] = (FIRST_SLOT + len(self.names), seq)
+        self.names.append(name)
+
+    def lookup(self, name):
+        return self._declared.get(name)
+
+    def capture(self, slot):
+        if slot not in self.cells: self.cells.append(slot)
+
+class FreeVariables:
+    def __init__(self):
+        self.sources = []
+        self._index = {}
+
+    def index(self, source):
+        key = tuple(source)
+        if key not in self._index:
+            self._index[key] = len(self.sources)
+            self.sources.append(source)
+        return self._index[key]
+
+class Resolver:
+    def __init__(self, global_names=(), check_globals=True):
+        self._globals = set(global_names)
+        self._check_globals = check_globals
+        self._chain = []
+        self._seq = 0
+        self._pending = []
+        self._locals = []
+
+    def resolve(self, program):
+        match program:
+            case ["program", *statements]:
+                self._declare_globals(statements)
+                resolved = ["program", *self._resolve_statements(statements)]
+                for pending in self._pending: self._resolve_func_body(*pending)
+                for scope, slot, node in self._locals:
+                    if slot in scope.cells: node[0] = CELL_FORMS[node[0]]
+                return resolved
+            case unexpected: assert False, f"Internal Error at `{unexpected}`."
+
+    def _declare_globals(self, statements):
+        for name in self._declared_names(statements):
+            assert name not in self._globals, f"`{name}` already defined."
+            self._globals.add(name)
+
+    def _declared_names(self, statements):
+        names = []
+        for statement in statements:
+            match statement:
+                case ["var", name, _]: names.append(name)
+                case ["seq", *statements]: names += self._declared_names(statements)
+        return names
+
+    def _resolve_statements(self, statements):
+        return [self._resolve_statement(statement) for statement in statements]
+
+    def _resolve_statement(self, statement):
+        match statement:
+            case ["block", *statements]: return self._resolve_block(statements)
+            case ["seq", *statements]: return ["seq", *self._resolve_statements(statements)]
+            case ["var", name, value]: return self._resolve_var(name, value)
+            case ["set", name, value]: return self._resolve_set(name, value)
+            case ["if", cond, conseq, alt]:
+                return ["if", self._resolve_expr(cond),
+                        self._resolve_statement(conseq), self._resolve_statement(alt)]
+            case ["while", cond, body]:
+                return ["while", self._resolve_expr(cond), self._resolve_statement(body)]
+            case ["return", value]: return ["return", self._resolve_expr(value)]
+            case ["print", expr]: return ["print", self._resolve_expr(expr)]
+            case ["expr", expr]: return ["expr", self._resolve_expr(expr)]
+            case ["[]=", target, index, value]:
+                return ["[]=", self._resolve_expr(target), self._resolve_expr(index), self._resolve_expr(value)]
+            case unexpected: assert False, f"Internal Error at `{unexpected}`."
+
+    def _resolve_block(self, statements):
+        if not self._declared_names(statements):
+            return ["seq", *self._resolve_statements(statements)]
+        scope = Scope(self._chain[-1][0].func if self._chain else None)
+        self._chain.append([scope, None])
+        resolved = self._resolve_statements(statements)
+        self._chain.pop()
+        return ["scope", scope.names, scope.cells, *resolved]
+
+    def _resolve_var(self, name, value):
+        value = self._resolve_expr(value)
+        if not self._chain: return ["var", name, value]
+        self._seq += 1
+        scope = self._chain[-1][0]
+        scope.declare(name, self._seq)
+        slot = scope.lookup(name)[0]
+        return self._local(scope, slot, ["define", slot, value])
+
+    def _resolve_set(self, name, value):
+        value = self._resolve_expr(value)
+        match self._lookup(name):
+            case None: return ["set", name, value]
+            case ("local", depth, slot, scope): return self._local(scope, slot, ["assign", depth, slot, value])
+            case ("free", depth, index, False): return ["free_assign", depth, index, value]
+            case ("free", depth, index, True): return ["checked_free_assign", depth, index, name, value]
+
+    def _resolve_expr(self, expr):
+        match expr:
+            case int(value) | bool(value): return value
+            case str(name):
+                match self._lookup(name):
+                    case None: return name
+                    case ("local", depth, slot, scope): return self._local(scope, slot, ["local", depth, slot])
+                    case ("free", depth, index, False): return ["free", depth, index]
+                    case ("free", depth, index, True): return ["checked_free", depth, index, name]
+            case ["func", params, body]:
+                free = FreeVariables()
+                func = ["func", params, None, None, free.sources, None]
+                chain = [[scope, self._seq if horizon is None else horizon]
+                         for scope, horizon in self._chain]
+                self._pending.append((func, free, params, body, chain))
+                return func
+            case [str(op), a, b] if op in PRECEDENCE:
+                return [op, self._resolve_expr(a), self._resolve_expr(b)]
+            case ["[...]", *elements]: return ["[...]", *[self._resolve_expr(element) for element in elements]]
+            case ["[]", target, index]: return ["[]", self._resolve_expr(target), self._resolve_expr(index)]
+            case [func, *args]:
+                return ["call", self._resolve_expr(func), *[self._resolve_expr(arg) for arg in args]]
+            case unexpected: assert False, f"Internal Error at `{unexpected}`."
+
+    def _resolve_func_body(self, func, free, params, body, chain):
+        self._chain = chain
+        scope = Scope(free)
+        self._seq += 1
+        for param in params: scope.declare(param, self._seq)
+        self._chain.append([scope, None])
+        match body:
+            case ["block", *statements] if not set(params) & set(self._declared_names(statements)):
+                resolved = ["seq", *self._resolve_statements(statements)]
+            case _: resolved = self._resolve_statement(body)
+        func[2], func[3], func[5] = scope.names, scope.cells, resolved
+        self._chain = []
+
+    def _local(self, scope, slot, node):
+        self._locals.append((scope, slot, node))
+        return node
+
+    def _lookup(self, name):
+        for i in range(len(self._chain) - 1, -1, -1):
+            scope, horizon = self._chain[i]
+            if (found := scope.lookup(name)) is None: continue
+            slot, seq = found
+            if scope.func is self._chain[-1][0].func: return ("local", len(self._chain) - 1 - i, slot, scope)
+            scope.capture(slot)
+            return ("free", *self._capture(i, slot), horizon is not None and seq > horizon)
+        assert name in self._globals or not self._check_globals, f"`{name}` not defined."
+        return None
+
+    def _capture(self, i, slot):
+        source, base = ["cell", None, slot], i
+        for j in range(i + 1, len(self._chain)):
+            if self._chain[j][0].func is self._chain[j - 1][0].func: continue
+            source[1] = j - 1 - base
+            source, base = ["free", None, self._chain[j][0].func.index(source)], j
+        return len(self._chain) - 1 - base, source[2]
@@ -0,0 +1,44 @@
+import queue
+
+BUFFER_SIZE = 1 << 10
+
+class CallbackSink:
+    def __init__(self, callback):
+        self.append = callback
+
+    def flush(self):
+        pass
+
+class WriterSink:
+    def __init__(self, file, buffer_size=BUFFER_SIZE):
+        self._file = file
+        self._buffer_size = buffer_size
+        self._buffer = []
+
+    def append(self, value):
+        self._buffer.append(f"{value}\n")
+        if len(self._buffer) >= self._buffer_size: self.flush()
+
+    def flush(self):
+        if self._buffer:
+            self._file.write("".join(self._buffer))
+            self._buffer.clear()
+        self._file.flush()
+
+class QueueSink:
+    DONE = object()
+
+    def __init__(self, maxsize=BUFFER_SIZE):
+        self._queue = queue.Queue(maxsize)
+
+    def append(self, value):
+        self._queue.put(value)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self._queue.put(self.DONE)
+
+    def __iter__(self):
+        while (value := self._queue.get()) is not self.DONE: yield value
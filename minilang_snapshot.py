@@ -0,0 +1,133 @@
+import ctypes
+import pickle
+from array import array
+
+from minilang import Closure, Environment, Evaluator
+from minilang_closure import ClosureEvaluator
+
+FORMAT_VERSION = 3
+KINDS = { Closure: "c", Environment: "e" }
+
+class _Pickler(pickle.Pickler):
+    def __init__(self, file, refs):
+        super().__init__(file, pickle.HIGHEST_PROTOCOL)
+        self._refs = refs
+
+    def persistent_id(self, obj):
+        return self._refs.get(id(obj))
+
+    def reducer_override(self, obj):
+        if obj.__class__ is memoryview: return _view, (obj.obj, *_bounds(obj))
+        return NotImplemented
+
+class _Unpickler(pickle.Unpickler):
+    def __init__(self, file, evaluator):
+        super().__init__(file)
+        self.objects = []
+        self._evaluator = evaluator
+
+    def persistent_load(self, ref):
+        return self.objects[ref] if ref.__class__ is int else _resolve(self._evaluator, ref)
+
+def save(evaluator, path):
+    with open(path, "wb") as file: dump(evaluator, file)
+
+def dump(evaluator, file, value=None):
+    _check_engine(evaluator)
+    refs = _refs(evaluator)
+    objects = []
+    stack = [*evaluator._env._values.values(), value]
+    while stack:
+        obj = stack.pop()
+        if id(obj) in refs or obj.__class__ not in KINDS: continue
+        refs[id(obj)] = len(objects)
+        objects.append(obj)
+        if obj.__class__ is Closure: stack.append(obj.env)
+        else: stack += [*obj._values.values(), obj._parent]
+    pickler = _Pickler(file, refs)
+    pickler.dump((FORMAT_VERSION, type(evaluator).__name__, "".join(KINDS[obj.__class__] for obj in objects)))
+    pickler.dump((evaluator._env._values, [_fields(obj) for obj in objects], value))
+
+def restore(path, evaluator=None):
+    with open(path, "rb") as file: return load(file, evaluator)[0]
+
+def load(file, evaluator=None):
+    evaluator = Evaluator() if evaluator is None else evaluator
+    _check_engine(evaluator)
+    unpickler = _Unpickler(file, evaluator)
+    version, engine, kinds = unpickler.load()
+    assert version == FORMAT_VERSION, f"Snapshot format {version} is not supported."
+    assert engine == type(evaluator).__name__, f"Snapshot was saved from `{engine}`."
+    unpickler.objects = [Closure(None, None, None) if kind == "c" else Environment() for kind in kinds]
+    values, records, value = unpickler.load()
+    for obj, fields in zip(unpickler.objects, records): _set_fields(obj, fields)
+    return _define(evaluator, values), value
+
+def fork(evaluator, target=None):
+    _check_engine(evaluator)
+    target = type(evaluator)() if target is None else target
+    _check_engine(target)
+    copies = { key: _resolve(target, ref) for key, ref in _refs(evaluator).items() }
+    pending = []
+
+    def copy(value):
+        if (copied := copies.get(id(value))) is not None: return copied
+        if value.__class__ is memoryview:
+            if (buffer := copies.get(id(value.obj))) is None: buffer = copies[id(value.obj)] = array("q", value.obj)
+            copied = copies[id(value)] = _view(buffer, *_bounds(value))
+            return copied
+        if value.__class__ is Closure: copied = Closure(None, None, None)
+        elif value.__class__ is Environment: copied = Environment()
+        else: return value
+        copies[id(value)] = copied
+        pending.append((value, copied))
+        return copied
+
+    values = { name: copy(value) for name, value in evaluator._env._values.items() }
+    while pending:
+        original, copied = pending.pop()
+        if original.__class__ is Closure:
+            copied.params, copied.body, copied.env = original.params, original.body, copy(original.env)
+        else:
+            copied._values = { name: copy(value) for name, value in original._values.items() }
+            copied._parent = copy(original._parent)
+    return _define(target, values)
+
+def _bounds(view):
+    if not view: return 0, 0
+    start = (ctypes.addressof(ctypes.c_char.from_buffer(view)) - view.obj.buffer_info()[0]) // view.itemsize
+    return start, start + len(view)
+
+def _view(buffer, start, stop):
+    return memoryview(buffer)[start:stop]
+
+def _check_engine(evaluator):
+    assert not isinstance(evaluator, ClosureEvaluator), "Closure engine evaluators cannot be snapshotted."
+
+def _refs(evaluator):
+    refs = { id(evaluator._env): "" }
+    for name, value in evaluator._env._values.items():
+        if callable(value): refs.setdefault(id(value), name)
+    return refs
+
+def _resolve(evaluator, ref):
+    if ref == "": return evaluator._env
+    return evaluator._env._values[ref] if ref in evaluator._env._values else _unavailable(ref)
+
+def _unavailable(name):
+    def builtin(*args): assert False, f"Builtin `{name}` is not available."
+    return builtin
+
+def _fields(obj):
+    if obj.__class__ is Closure: return (obj.params, obj.body, obj.env)
+    return (obj._values, obj._parent)
+
+def _set_fields(obj, fields):
+    if obj.__class__ is Closure: obj.params, obj.body, obj.env = fields
+    else: obj._values, obj._parent = fields
+
+def _define(evaluator, values):
+    env = evaluator._env
+    for name, value in values.items():
+        if name not in env._values or env._values[name] is not value: env.define(name, value)
+    return evaluator
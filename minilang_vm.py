@@ -0,0 +1,327 @@
+from array import array
+from types import CoroutineType
+
+from minilang import (PRECEDENCE, UNLIMITED, Closure, Environment, Evaluator, array_index, array_store, declares,
+                      make_array, to_list)
+
+(CONST, LOAD, DEFINE, ASSIGN, POP, PRINT,
+ POW, MUL, DIV, ADD, SUB, EQ, NE,
+ JUMP, JUMP_IF_FALSE, ENTER_SCOPE, EXIT_SCOPE,
+ MAKE_FUNC, CALL, TAIL_CALL, RETURN, HALT,
+ LT, GT, LE, GE, LESS, JUMP_IF_FALSE_OR_POP, JUMP_IF_TRUE_OR_POP,
+ STORE_INDEX, MAKE_ARRAY, INDEX) = range(32)
+
+BINOPS = { "^": POW, "*": MUL, "/": DIV, "+": ADD, "-": SUB, "=": EQ, "#": NE, "<": LT, ">": GT, "<=": LE, ">=": GE }
+SHORT_CIRCUITS = { "and": JUMP_IF_FALSE_OR_POP, "or": JUMP_IF_TRUE_OR_POP }
+
+class Code:
+    __slots__ = ("ops", "consts", "names", "source")
+
+    def __init__(self, ops, consts, names, source=None):
+        self.ops = ops
+        self.consts = consts
+        self.names = names
+        self.source = source
+
+class Compiler:
+    def __init__(self, intrinsic_less=True):
+        self._intrinsic_less = intrinsic_less
+        self._ops = array("i")
+        self._consts = []
+        self._const_index = {}
+        self._names = []
+        self._name_index = {}
+
+    def compile_program(self, program):
+        match program:
+            case ["program", *statements]:
+                if declares(program, "less"): self._intrinsic_less = False
+                for statement in statements: self._compile_statement(statement)
+                self._emit(HALT)
+                return self._code()
+            case unexpected: assert False, f"Internal Error at `{unexpected}`."
+
+    def _compile_func(self, params, body):
+        compiler = Compiler(self._intrinsic_less)
+        compiler._compile_statement(body)
+        compiler._emit(CONST, compiler._const(0))
+        compiler._emit(RETURN)
+        return Closure(params, compiler._code(body), None)
+
+    def _code(self, source=None):
+        return Code(self._ops, tuple(self._consts), tuple(self._names), source)
+
+    def _compile_statement(self, statement):
+        match statement:
+            case ["block", *statements]:
+                self._emit(ENTER_SCOPE)
+                for statement in statements: self._compile_statement(statement)
+                self._emit(EXIT_SCOPE)
+            case ["seq", *statements]:
+                for statement in statements: self._compile_statement(statement)
+            case ["var", name, value]:
+                self._compile_expr(value)
+                self._emit(DEFINE, self._name(name))
+            case ["set", name, value]:
+                self._compile_expr(value)
+                self._emit(ASSIGN, self._name(name))
+            case ["if", cond, conseq, alt]:
+                self._compile_expr(cond)
+                jump_to_alt = self._emit(JUMP_IF_FALSE)
+                self._compile_statement(conseq)
+                jump_to_end = self._emit(JUMP)
+                self._patch(jump_to_alt)
+                self._compile_statement(alt)
+                self._patch(jump_to_end)
+            case ["while", cond, body]:
+                start = len(self._ops)
+                self._compile_expr(cond)
+                jump_to_end = self._emit(JUMP_IF_FALSE)
+                self._compile_statement(body)
+                self._emit(JUMP, start)
+                self._patch(jump_to_end)
+            case ["return", ["func" | "[...]" | "[]", *_] as value]:
+                self._compile_expr(value)
+                self._emit(RETURN)
+            case ["return", [str(op), _, _] as value] if op in PRECEDENCE or op == "less" and self._intrinsic_less:
+                self._compile_expr(value)
+                self._emit(RETURN)
+            case ["return", [func, *args]]:
+                self._compile_expr(func)
+                for arg in args: self._compile_expr(arg)
+                self._emit(TAIL_CALL, len(args))
+            case ["return", value]:
+                self._compile_expr(value)
+                self._emit(RETURN)
+            case ["print", expr]:
+                self._compile_expr(expr)
+                self._emit(PRINT)
+            case ["expr", expr]:
+                self._compile_expr(expr)
+                self._emit(POP)
+            case ["[]=", target, index, value]:
+                self._compile_expr(target)
+                self._compile_expr(index)
+                self._compile_expr(value)
+                self._emit(STORE_INDEX)
+            case unexpected: assert False, f"Internal Error at `{unexpected}`."
+
+    def _compile_expr(self, expr):
+        match expr:
+            case int(value) | bool(value): self._emit(CONST, self._const(value))
+            case str(name): self._emit(LOAD, self._name(name))
+            case ["func", params, body]:
+                self._emit(MAKE_FUNC, self._const(self._compile_func(params, body)))
+            case ["and" | "or" as op, a, b]:
+                self._compile_expr(a)
+                jump_to_end = self._emit(SHORT_CIRCUITS[op])
+                self._compile_expr(b)
+                self._patch(jump_to_end)
+            case [str(op), a, b] if op in PRECEDENCE:
+                self._compile_expr(a)
+                self._compile_expr(b)
+                self._emit(BINOPS[op])
+            case ["[...]", *elements]:
+                for element in elements: self._compile_expr(element)
+                self._emit(MAKE_ARRAY, len(elements))
+            case ["[]", target, index]:
+                self._compile_expr(target)
+                self._compile_expr(index)
+                self._emit(INDEX)
+            case ["less", a, b] if self._intrinsic_less:
+                self._compile_expr(a)
+                self._compile_expr(b)
+                self._emit(LESS)
+            case [func, *args]:
+                self._compile_expr(func)
+                for arg in args: self._compile_expr(arg)
+                self._emit(CALL, len(args))
+            case unexpected: assert False, f"Internal Error at `{unexpected}`."
+
+    def _emit(self, op, arg=0):
+        self._ops.extend((op, arg))
+        return len(self._ops) - 1
+
+    def _patch(self, arg_position):
+        self._ops[arg_position] = len(self._ops)
+
+    def _const(self, value):
+        key = (type(value), value) if isinstance(value, (int, bool)) else id(value)
+        if key not in self._const_index:
+            self._const_index[key] = len(self._consts)
+            self._consts.append(value)
+        return self._const_index[key]
+
+    def _name(self, name):
+        if name not in self._name_index:
+            self._name_index[name] = len(self._names)
+            self._names.append(name)
+        return self._name_index[name]
+
+class VM(Evaluator):
+    def __init__(self, sink=None):
+        super().__init__(sink=sink)
+
+    def eval_program(self, program):
+        self._reset_output()
+        self._execute(program)
+
+    def eval_statements(self, statements):
+        for statement in statements:
+            self._reset_output()
+            stopped = self._execute(["program", to_list(statement)])
+            yield from self._printed()
+            if stopped: break
+
+    def _execute(self, program):
+        global_env = self._env
+        code = Compiler().compile_program(to_list(program))
+        try: return self._run(code, global_env)
+        finally:
+            self._env = global_env
+            self._flush_output()
+
+    def _run(self, code, env):
+        steps = self._steps(code, env, UNLIMITED)
+        try: awaitable = next(steps)
+        except StopIteration as stop: return stop.value
+        awaitable.close()
+        assert False, "Async builtin called outside async evaluation."
+
+    def _apply(self, func, args):
+        if callable(func): return func(*args)
+        env = self._env
+        result = Environment()
+        ops = array("i", [CONST, 0])
+        for i in range(1, len(args) + 1): ops += array("i", [CONST, i])
+        ops += array("i", [CALL, len(args), DEFINE, 0, HALT, 0])
+        try: self._run(Code(ops, (func, *args), ("value",)), result)
+        finally: self._env = env
+        return result.get("value")
+
+    def _steps(self, code, env, slice_steps):
+        ops, consts, names = code.ops, code.consts, code.names
+        global_values, builtin_less = self._globals, self._less
+        budget = slice_steps
+        stack = []
+        push, pop = stack.append, stack.pop
+        frames = []
+        pc = 0
+        while True:
+            op = ops[pc]
+            arg = ops[pc + 1]
+            pc += 2
+            if op == LOAD: push(env.get(names[arg]))
+            elif op == CONST: push(consts[arg])
+            elif op == CALL:
+                args = stack[len(stack) - arg:]
+                del stack[len(stack) - arg:]
+                func = pop()
+                if callable(func):
+                    self._env = env
+                    if (value := func(*args)).__class__ is CoroutineType: value = yield value
+                    push(value)
+                    continue
+                budget -= 1
+                if not budget:
+                    yield None
+                    budget = slice_steps
+                frames.append((ops, consts, names, pc, env))
+                env = Environment(func.env)
+                for param, value in zip(func.params, args): env.define(param, value)
+                ops, consts, names = func.body.ops, func.body.consts, func.body.names
+                pc = 0
+            elif op == RETURN:
+                if not frames: return True
+                ops, consts, names, pc, env = frames.pop()
+            elif op == TAIL_CALL:
+                args = stack[len(stack) - arg:]
+                del stack[len(stack) - arg:]
+                func = pop()
+                if callable(func):
+                    self._env = env
+                    if (value := func(*args)).__class__ is CoroutineType: value = yield value
+                    push(value)
+                    if not frames: return True
+                    ops, consts, names, pc, env = frames.pop()
+                    continue
+                budget -= 1
+                if not budget:
+                    yield None
+                    budget = slice_steps
+                env = Environment(func.env)
+                for param, value in zip(func.params, args): env.define(param, value)
+                ops, consts, names = func.body.ops, func.body.consts, func.body.names
+                pc = 0
+            elif op == JUMP_IF_FALSE:
+                if not pop(): pc = arg
+            elif op == LESS:
+                b = pop()
+                if (less := global_values["less"]) is builtin_less: stack[-1] = stack[-1] < b
+                else: stack[-1] = self._apply(less, [stack[-1], b])
+            elif op == JUMP:
+                pc = arg
+                budget -= 1
+                if not budget:
+                    yield None
+                    budget = slice_steps
+            elif op == ADD:
+                b = pop()
+                stack[-1] = stack[-1] + b
+            elif op == SUB:
+                b = pop()
+                stack[-1] = stack[-1] - b
+            elif op == MUL:
+                b = pop()
+                stack[-1] = stack[-1] * b
+            elif op == DIV:
+                b = pop()
+                stack[-1] = self._div(stack[-1], b)
+            elif op == POW:
+                b = pop()
+                stack[-1] = stack[-1] ** b
+            elif op == EQ:
+                b = pop()
+                stack[-1] = stack[-1] == b
+            elif op == NE:
+                b = pop()
+                stack[-1] = stack[-1] != b
+            elif op == LT:
+                b = pop()
+                stack[-1] = stack[-1] < b
+            elif op == GT:
+                b = pop()
+                stack[-1] = stack[-1] > b
+            elif op == LE:
+                b = pop()
+                stack[-1] = stack[-1] <= b
+            elif op == GE:
+                b = pop()
+                stack[-1] = stack[-1] >= b
+            elif op == INDEX:
+                i = pop()
+                stack[-1] = array_index(stack[-1], i)
+            elif op == STORE_INDEX:
+                value, i = pop(), pop()
+                array_store(pop(), i, value)
+            elif op == MAKE_ARRAY:
+                values = make_array(stack[len(stack) - arg:])
+                del stack[len(stack) - arg:]
+                push(values)
+            elif op == JUMP_IF_FALSE_OR_POP:
+                if stack[-1]: pop()
+                else: pc = arg
+            elif op == JUMP_IF_TRUE_OR_POP:
+                if stack[-1]: pc = arg
+                else: pop()
+            elif op == DEFINE: env.define(names[arg], pop())
+            elif op == ASSIGN: env.assign(names[arg], pop())
+            elif op == ENTER_SCOPE: env = Environment(env)
+            elif op == EXIT_SCOPE: env = env._parent
+            elif op == POP: pop()
+            elif op == PRINT: self.output.append(self._to_print(pop()))
+            elif op == MAKE_FUNC:
+                func = consts[arg]
+                push(Closure(func.params, func.body, env))
+            elif op == HALT: return False
+            else: assert False, f"Internal Error at `{op}`."
@@ -0,0 +1,48 @@
+import copy
+import unittest
+
+from benchmarks.runner import compare, run
+from benchmarks.workloads import WORKLOADS
+from minilang import Parser, Evaluator
+
+class TestBenchmarks(unittest.TestCase):
+    def test_workloads_run(self):
+        for name, workload in WORKLOADS.items():
+            source, ops = workload(0.01)
+            evaluator = Evaluator()
+            evaluator.eval_program(Parser(source).parse_program())
+            self.assertGreater(ops, 0, name)
+        self.assertEqual(WORKLOADS["tail_calls"](1)[1], 1_000_001)
+
+    def test_report(self):
+        report = run("vm", 0.01, 1, ["fib", "while_loop"])
+        self.assertEqual((report["engine"], report["scale"]), ("vm", 0.01))
+        self.assertEqual(list(report["results"]), ["fib", "while_loop"])
+        self.assertEqual(list(report["results"]["fib"]), ["scanner", "parser", "evaluator"])
+        self.assertGreater(report["results"]["fib"]["evaluator"]["ops_per_sec"], 0)
+        self.assertGreater(report["calibration"], 0)
+
+    def test_regression_gate(self):
+        result = { "ops": 100, "seconds": 1.0, "ops_per_sec": 100.0, "peak_bytes": 1 << 20 }
+        baseline = { "engine": "tree", "scale": 1.0, "calibration": 1000.0,
+                     "results": { "fib": { "evaluator": result } } }
+        report = copy.deepcopy(baseline)
+        self.assertEqual(compare(report, baseline, 0.25), [])
+        report["results"]["fib"]["evaluator"]["ops_per_sec"] = 70.0
+        report["results"]["fib"]["evaluator"]["peak_bytes"] = 2 << 20
+        self.assertEqual(compare(report, baseline, 0.25),
+                         ["fib/evaluator: 70 ops/sec (baseline 100 after calibration)",
+                          "fib/evaluator: peak 2,097,152 bytes (baseline 1,048,576)"])
+        report["calibration"] = 500.0
+        self.assertEqual(compare(report, baseline, 0.25), ["fib/evaluator: peak 2,097,152 bytes (baseline 1,048,576)"])
+        report["results"]["fib"]["evaluator"]["ops_per_sec"] = 30.0
+        self.assertEqual(compare(report, baseline, 0.25)[0], "fib/evaluator: 30 ops/sec (baseline 50 after calibration)")
+        report["scale"] = 0.5
+        with self.assertRaises(AssertionError): compare(report, baseline, 0.25)
+        del baseline["calibration"]
+        report["scale"] = 1.0
+        with self.assertRaises(AssertionError) as cm: compare(report, baseline, 0.25)
+        self.assertEqual(str(cm.exception), "Baseline has no calibration; regenerate it with `--output`.")
+
+if __name__ == "__main__":
+    unittest.main()
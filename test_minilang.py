@@ -1,6 +1,13 @@
+import io
+import mmap
+import os
+import subprocess
+import sys
+import tempfile
 import unittest
 
-from minilang import Parser, Evaluator
+from minilang import BOOLEAN, EOF, NAME, NUMBER, SYMBOL, Add, Call, Closure, Const, Parser, Evaluator, Program, \
+                     Print, Scanner, Variable, compact, to_list
 
 def get_ast(source): return Parser(source).parse_program()
 
@@ -14,6 +21,10 @@ def get_error(source):
     except AssertionError as e: return str(e)
     else: return f"Error not occurred. out={output}"
 
+def get_stream_output(source, chunk_size=8):
+    evaluator = Evaluator()
+    return list(evaluator.eval_statements(Parser(source, chunk_size).parse_statements()))
+
 class TestMinilang(unittest.TestCase):
     def test_print(self):
         self.assertEqual(get_ast(""), ["program"])
@@ -235,6 +246,7 @@ class TestMinilang(unittest.TestCase):
         self.assertEqual(get_output("print func() { return less; }();"), ["<builtin>"])
         self.assertEqual(get_output("print func() { return less; }()(5, 6);"), ["true"])
         self.assertEqual(get_output("print func() { return func(a) { return a + 5; }; }()(6);"), [11])
+        self.assertEqual(get_output("print 1; return; print 2;"), [1])
 
     def test_gcd2(self):
         self.assertEqual(get_output("""
@@ -339,5 +351,262 @@ class TestMinilang(unittest.TestCase):
                                     print fib(6);
                                     """), [8])
 
+    def test_tail_call(self):
+        self.assertEqual(get_output("""
+                                    def count(n, acc) {
+                                        if n = 0 { return acc; }
+                                        return count(n - 1, acc + 1);
+                                    }
+                                    print count(10000, 0);
+                                    """), [10000])
+        self.assertEqual(get_output("""
+                                    def is_even(a) { if a = 0 { return true; } return is_odd(a - 1); }
+                                    def is_odd(a) { if a = 0 { return false; } return is_even(a - 1); }
+                                    print is_even(10001);
+                                    """), ["false"])
+        self.assertEqual(get_output("print func() { return less(1, 2); }();"), ["true"])
+
+    def test_scanner(self):
+        scanner = Scanner("var a_1 = 12;\n  print true;")
+        self.assertEqual(scanner.values, ["var", "a_1", "=", 12, ";", "print", True, ";", "$EOF"])
+        self.assertEqual(list(scanner.kinds), [NAME, NAME, SYMBOL, NUMBER, SYMBOL, NAME, BOOLEAN, SYMBOL, EOF])
+        self.assertEqual(list(scanner.offsets), [0, 4, 8, 10, 12, 16, 22, 26, 27])
+        self.assertEqual(scanner.line_col(0), (1, 1))
+        self.assertEqual(scanner.line_col(16), (2, 3))
+        self.assertEqual(scanner.line_col(27), (2, 14))
+
+    def test_error_position(self):
+        parser = Parser("print 1;\nprint 2:")
+        with self.assertRaises(AssertionError): parser.parse_program()
+        self.assertEqual(parser.position(), (2, 8))
+        parser = Parser("print (1")
+        with self.assertRaises(AssertionError): parser.parse_program()
+        self.assertEqual(parser.position(), (1, 9))
+
+    def test_calls_and_precedence(self):
+        self.assertEqual(get_ast("f(1)(2, g(3, 4 + 5))();"),
+                         ["program", ["expr", [[["f", 1], 2, ["g", 3, ["+", 4, 5]]]]]])
+        self.assertEqual(get_ast("print (f)(1,) ^ 2 ^ 3 * 4 - 5 = 6 # 7;"),
+                         ["program", ["print", ["#", ["=", ["-", ["*", ["^", ["f", 1], ["^", 2, 3]], 4], 5], 6], 7]]])
+        self.assertEqual(get_error("f(1 2);"), "Expected `,`, found `2`.")
+        self.assertEqual(get_error("print (1 + 2;"), "Expected `)`, found `;`.")
+
+    def test_comparison(self):
+        self.assertEqual(get_ast("print a < b + 1 or c >= d and e <= f = g > h;"),
+                         ["program", ["print", ["or", ["<", "a", ["+", "b", 1]],
+                                                ["and", [">=", "c", "d"], [">", ["=", ["<=", "e", "f"], "g"], "h"]]]]])
+        self.assertEqual(get_output("print 1 < 2; print 2 < 1; print 2 > 1; print 2 <= 2; print 3 >= 4;"),
+                         ["true", "false", "true", "true", "false"])
+        self.assertEqual(get_output("def f(a) { return a < 3 and a > 0; } print f(1); print f(3); print f(0);"),
+                         ["true", "false", "false"])
+        self.assertEqual(get_error("print and;"), "Unexpected token `and`.")
+        self.assertEqual(get_error("var or = 1;"), "Unexpected token `or`.")
+
+    def test_short_circuit(self):
+        self.assertEqual(get_output("print 0 and 1 / 0; print 5 or 1 / 0; print 0 or 7; print 3 and 0;"),
+                         [0, 5, 7, 0])
+        self.assertEqual(get_output("""
+                                    var n = 0;
+                                    def bump() { set n = n + 1; return true; }
+                                    print false and bump(); print true or bump(); print true and bump();
+                                    def g() { return false or bump(); } print g(); print n;
+                                    """), ["false", "true", "true", "true", 2])
+
+    def test_array(self):
+        self.assertEqual(get_ast("set a[i + 1] = [1, f(2)[0],][a[0]];"),
+                         ["program", ["[]=", "a", ["+", "i", 1], ["[]", ["[...]", 1, ["[]", ["f", 2], 0]], ["[]", "a", 0]]]])
+        self.assertEqual(get_output("""
+                                    var a = [1, 2, 3];
+                                    set a[1] = a[0] + a[2];
+                                    print a; print a[1]; print [] ; print a = [1, 4, 3]; print a # [1, 4];
+                                    def first(a) { return a[0]; }
+                                    print first([7]);
+                                    def make(n) { var a = array(n); set a[n - 1] = n; return a; }
+                                    print make(3);
+                                    """), ["[1, 4, 3]", 4, "[]", "true", "true", 7, "[0, 0, 3]"])
+        self.assertEqual(get_error("print [1][1];"), "Index `1` out of range.")
+        self.assertEqual(get_error("print 1[0];"), "Array expected.")
+        self.assertEqual(get_error("print [2 ^ 63];"), "Array elements must be 64-bit integers.")
+        self.assertEqual(get_error("var a = [0]; set a[0] = func() {};"), "Array elements must be 64-bit integers.")
+        self.assertEqual(get_error("print [1, 2;"), "Expected `,`, found `;`.")
+        self.assertEqual(get_error("print a[1;"), "Expected `]`, found `;`.")
+
+    def test_array_builtins(self):
+        self.assertEqual(get_output("""
+                                    var a = array(4);
+                                    array_fill(a, 3);
+                                    var b = array_slice(a, 1, 3);
+                                    set b[0] = 10;
+                                    print a; print array_len(b); print array_sum(a);
+                                    print array_add(a, [1, 1, 1, 1]); print array_mul(a, 2); print array_fill(b, 0 - 1);
+                                    print a;
+                                    """), ["[3, 10, 3, 3]", 2, 19, "[4, 11, 4, 4]", "[6, 20, 6, 6]", "[-1, -1]",
+                                           "[3, -1, -1, 3]"])
+        self.assertEqual(get_error("array_add([1], [1, 2]);"), "Array lengths differ.")
+        self.assertEqual(get_error("array_slice([1], 1, 2);"), "Slice `1:2` out of range.")
+        self.assertEqual(get_error("array(0 - 1);"), "Array size must be a non-negative integer.")
+        self.assertEqual(get_error("array_mul([2 ^ 62], 2);"), "Array elements must be 64-bit integers.")
+
+    def test_shadowed_less(self):
+        self.assertEqual(get_output("""
+                                    def f(less) { return less(1, 2); }
+                                    print f(func(a, b) { return 42; });
+                                    { var less = func(a, b) { return 7; }; print less(1, 2); }
+                                    print less(1, 2);
+                                    def g() { return less(2, 1); }
+                                    set less = func(a, b) { return a + b; };
+                                    print less(1, 2); print g();
+                                    """), [42, 7, "true", 3, 3])
+
+    def test_deep_expressions(self):
+        depth = 50000
+        ast = get_ast("print " + "(" * depth + "1" + ")" * depth + ";")
+        self.assertEqual(ast, ["program", ["print", 1]])
+        ast = get_ast("print " + "f(" * depth + ")" * depth + ";")[1][1]
+        for _ in range(depth - 1): ast = ast[1]
+        self.assertEqual(ast, ["f"])
+        ast = get_ast("print " + " ^ ".join(["2"] * depth) + ";")[1][1]
+        for _ in range(depth - 1): ast = ast[2]
+        self.assertEqual(ast, 2)
+
+    def test_stream(self):
+        source = "var abcdefghijkl = 1234567890; print abcdefghijkl;\n print 5 + 6; { print 7; }"
+        self.assertEqual(get_stream_output(io.StringIO(source)), [1234567890, 11, 7])
+        self.assertEqual(get_stream_output(io.StringIO(source), chunk_size=1), [1234567890, 11, 7])
+        self.assertEqual(get_stream_output(io.BytesIO("var α = 1; print α;".encode()), chunk_size=1), [1])
+        self.assertEqual(get_stream_output(io.StringIO("")), [])
+        self.assertEqual(get_stream_output(io.StringIO("def f() { return g(); } def g() { return 5; } print f();")), [5])
+        self.assertEqual(get_stream_output(io.StringIO("print 1; return; print 2;")), [1])
+        self.assertEqual(get_stream_output(io.StringIO("def f() { print 1; } return f(); print 2;")), [1])
+
+    def test_stream_mmap(self):
+        with tempfile.TemporaryFile() as file:
+            file.write(b"print 5; print 6;")
+            file.flush()
+            with mmap.mmap(file.fileno(), 0) as mapped:
+                self.assertEqual(get_stream_output(mapped), [5, 6])
+
+    def test_stream_is_incremental(self):
+        reads = []
+        class Reader(io.StringIO):
+            def read(self, size=-1):
+                reads.append(self.tell())
+                return super().read(size)
+        statements = Evaluator().eval_statements(Parser(Reader("print 1; " * 100), 16).parse_statements())
+        self.assertEqual(next(statements), 1)
+        self.assertLess(max(reads), 100)
+
+    def test_stream_error_position(self):
+        parser = Parser(io.StringIO("print 1;\nprint 22:"), 4)
+        with self.assertRaises(AssertionError): parser.parse_program()
+        self.assertEqual(parser.position(), (2, 9))
+
+    def test_compact(self):
+        ast = get_ast("print 1 + a; print print(true);")
+        program = compact(ast)
+        self.assertIsInstance(program, Program)
+        self.assertIsInstance(program.statements[0], Print)
+        self.assertIsInstance(program.statements[0].expr, Add)
+        self.assertIsInstance(program.statements[1].expr, Call)
+        self.assertIs(compact(["expr", 1]).expr, compact(["print", 1]).expr)
+        self.assertIsNot(compact(["expr", 1]).expr, compact(["expr", True]).expr)
+        self.assertEqual(to_list(program), ast)
+        self.assertEqual(to_list(compact(get_ast("""
+                                         def f(a, b) { if a = b { return a; } else { set a = 0 - b; } }
+                                         while f # 1 { var g = func() { return f(2 ^ 3 * 4 / 5, 6); }; }
+                                         """))), get_ast("""
+                                         def f(a, b) { if a = b { return a; } else { set a = 0 - b; } }
+                                         while f # 1 { var g = func() { return f(2 ^ 3 * 4 / 5, 6); }; }
+                                         """))
+
+    def test_compact_program(self):
+        e = Evaluator()
+        e.eval_program(compact(get_ast("var a = 2;")))
+        e.eval_program(Program((Print(Add(Const(1), Variable("a"))),)))
+        self.assertEqual(e.output, [3])
+        self.assertEqual(list(e.eval_statements([Print(Variable("a")), ["print", "a"]])), [2, 2])
+
+    def test_positions(self):
+        parser = Parser("print 1;\nif true {\n  var a = 1;\n}", track_positions=True)
+        program = compact(parser.parse_program())
+        self.assertEqual(program.statements[0].pos, (1, 1))
+        self.assertEqual(program.statements[1].pos, (2, 1))
+        self.assertEqual(program.statements[1].conseq.pos, (2, 9))
+        self.assertEqual(program.statements[1].conseq.statements[0].pos, (3, 3))
+        self.assertIsNone(program.statements[1].alt.pos)
+        self.assertIsNone(compact(Parser("print 1;").parse_program()).statements[0].pos)
+
+    def test_closure_value(self):
+        e = Evaluator()
+        e.eval_program(get_ast("def f() {} var g = f; print f = g; print f = func() {};"))
+        self.assertEqual(e.output, ["true", "false"])
+        e.eval_program(get_ast("print f;"))
+        self.assertEqual(e.output, ["<func>"])
+
+class TestLimits(unittest.TestCase):
+    def get_error(self, source, **limits):
+        evaluator = Evaluator(**limits)
+        try: evaluator.eval_program(get_ast(source))
+        except AssertionError as e: return str(e)
+        else: return f"Error not occurred. output={evaluator.output}"
+
+    def test_steps(self):
+        self.assertEqual(self.get_error("while true {}", max_steps=1000), "Step limit exceeded.")
+        self.assertEqual(self.get_error("def f() { return f(); } f();", max_steps=1000), "Step limit exceeded.")
+        self.assertEqual(self.get_error("def f() { f(); } f();", max_steps=10), "Step limit exceeded.")
+        evaluator = Evaluator(max_steps=10)
+        for _ in range(3): evaluator.eval_program(get_ast("{ var i = 0; while i # 10 { set i = i + 1; } }"))
+
+    def test_depth(self):
+        source = "def f(n) { if n = 0 { return 0; } return f(n - 1) + 1; } print f(50);"
+        self.assertEqual(self.get_error(source, max_depth=50), "Call depth limit exceeded.")
+        evaluator = Evaluator(max_depth=51)
+        evaluator.eval_program(get_ast(source))
+        self.assertEqual(evaluator.output, [50])
+        self.assertEqual(self.get_error("def f(n) { return f(n - 1) + 1; } f(0);"), "Call depth limit exceeded.")
+        evaluator = Evaluator(max_depth=1)
+        evaluator.eval_program(get_ast("def f(n) { if n = 0 { return 0; } return f(n - 1); } print f(100);"))
+        self.assertEqual(evaluator.output, [0])
+
+    def test_int_bits(self):
+        self.assertEqual(self.get_error("print 2 ^ 2 ^ 30;", max_int_bits=64), "Integer size limit exceeded.")
+        self.assertEqual(self.get_error("print 2 ^ 64;", max_int_bits=64), "Integer size limit exceeded.")
+        self.assertEqual(self.get_error("print 3 ^ 40 * 3 ^ 40;", max_int_bits=64), "Integer size limit exceeded.")
+        evaluator = Evaluator(max_int_bits=64)
+        evaluator.eval_program(get_ast("print 2 ^ 63 - 1; print 1 ^ 100000; print (0 - 2) ^ 63; print 2 ^ (0 - 1);"))
+        self.assertEqual(evaluator.output, [2 ** 63 - 1, 1, -2 ** 63, 0.5])
+
+    def test_array_len(self):
+        limits = { "max_steps": 100, "max_depth": 10, "max_int_bits": 64 }
+        self.assertEqual(self.get_error("var a = array(2 ^ 40);", **limits), "Array size limit exceeded.")
+        self.assertEqual(self.get_error("var a = array(11);", max_array_len=10), "Array size limit exceeded.")
+        self.assertEqual(self.get_error("var a = array(0 - 1);", max_array_len=10),
+                         "Array size must be a non-negative integer.")
+        evaluator = Evaluator(max_array_len=10)
+        evaluator.eval_program(get_ast("var a = array(10); array_fill(a, 2); print array_sum(array_add(a, a));"))
+        self.assertEqual(evaluator.output, [40])
+
+    def test_env_restored_after_error(self):
+        evaluator = Evaluator(max_steps=5)
+        with self.assertRaises(AssertionError): evaluator.eval_program(get_ast("def f() { { f(); } } f();"))
+        evaluator.eval_program(get_ast("var a = 1; print a;"))
+        self.assertEqual(evaluator.output, [1])
+
+class TestCli(unittest.TestCase):
+    def run_file(self, source, *options):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "main.ml")
+            with open(path, "w") as file: file.write(source)
+            process = subprocess.run([sys.executable, "minilang.py", *options, path], capture_output=True, text=True,
+                                     cwd=os.path.dirname(__file__) or ".")
+        return process.stdout.splitlines()
+
+    def test_errors(self):
+        for options in ((), ("--optimize",)):
+            self.assertEqual(self.run_file("print 1;\nprint 2\n", *options),
+                             ["1", "Error at line 3, column 1: Expected `;`, found `$EOF`."])
+            self.assertEqual(self.run_file("print 1;\nprint 1 / 0;\nprint 2", *options),
+                             ["1", "Error: Division by zero."])
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,61 @@
+import asyncio
+import unittest
+from unittest import mock
+
+import test_minilang
+from minilang import Parser
+from minilang_async import AsyncEvaluator
+from minilang_sinks import CallbackSink
+from minilang_vm import VM
+
+class SyncAsyncEvaluator(AsyncEvaluator):
+    def eval_program(self, program):
+        asyncio.run(self.eval_program_async(program))
+
+class TestAsyncEvaluator(test_minilang.TestMinilang):
+    def setUp(self):
+        patcher = mock.patch.object(test_minilang, "Evaluator", SyncAsyncEvaluator)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_interleaving(self):
+        events = []
+        source = "var i = 0; while i # 3 { print i; set i = i + 1; }"
+
+        async def main():
+            evaluators = [AsyncEvaluator(1, sink=CallbackSink(lambda value, name=name: events.append((name, value))))
+                          for name in "ab"]
+            await asyncio.gather(*(e.eval_program_async(Parser(source).parse_program()) for e in evaluators))
+
+        asyncio.run(main())
+        self.assertEqual(events, [("a", 0), ("b", 0), ("a", 1), ("b", 1), ("a", 2), ("b", 2)])
+
+    def test_async_builtin(self):
+        async def fetch(n):
+            await asyncio.sleep(0)
+            return n * 10
+
+        evaluator = AsyncEvaluator(builtins={ "fetch": fetch })
+        asyncio.run(evaluator.eval_program_async(Parser("""
+                                                        def f(n) { return fetch(n); }
+                                                        print fetch(1) + f(2);
+                                                        """).parse_program()))
+        self.assertEqual(evaluator.output, [30])
+        with self.assertRaises(AssertionError) as cm: evaluator.eval_program(Parser("print fetch(1);").parse_program())
+        self.assertEqual(str(cm.exception), "Async builtin called outside async evaluation.")
+
+    def test_statements(self):
+        async def main():
+            evaluator = AsyncEvaluator()
+            statements = Parser("print 1; print 2; return 0; print 3;").parse_statements()
+            return [value async for value in evaluator.eval_statements_async(statements)]
+
+        self.assertEqual(asyncio.run(main()), [1, 2])
+
+    def test_sync_vm_unchanged(self):
+        vm = VM()
+        vm.eval_program(Parser("var i = 0; while i # 5000 { set i = i + 1; } print i;").parse_program())
+        self.assertEqual(vm.output, [5000])
+
+if __name__ == "__main__":
+    unittest.main()
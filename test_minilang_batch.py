@@ -0,0 +1,59 @@
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from minilang_batch import Result, run_batch, run_one
+
+SOURCES = ["print 1;", "print 1; print 1 / 0;", "print 1", "print 2 ^ 10;", "def f() { return 3; } print f();"]
+RESULTS = [Result([1]), Result([1], "Division by zero."),
+           Result([], "Error at line 1, column 8: Expected `;`, found `$EOF`."), Result([1024]), Result([3])]
+
+class TestBatch(unittest.TestCase):
+    def test_run_one(self):
+        for source, result in zip(SOURCES, RESULTS): self.assertEqual(run_one(source), result)
+        self.assertEqual(run_one("print func() {} + 1;").error[:10], "TypeError:")
+
+    def test_order_and_chunks(self):
+        sources = SOURCES * 7
+        for chunk_size in (None, 1, 3, 100):
+            self.assertEqual(run_batch(sources, workers=3, chunk_size=chunk_size), RESULTS * 7)
+        self.assertEqual(run_batch(sources, workers=1), RESULTS * 7)
+        self.assertEqual(run_batch([], workers=2), [])
+
+    def test_engines_and_limits(self):
+        for engine in ("tree", "closure", "vm"):
+            self.assertEqual(run_batch(SOURCES, workers=2, engine=engine), RESULTS)
+        self.assertEqual(run_one("while true {}", limits={ "max_steps": 100 }), Result([], "Step limit exceeded."))
+        for engine in ("closure", "vm"):
+            for run in (lambda: run_one("while true {}", engine=engine, limits={ "max_steps": 10 }),
+                        lambda: run_batch(["print 1;"] * 2, workers=2, engine=engine, limits={ "max_depth": 10 })):
+                with self.assertRaises(AssertionError) as cm: run()
+                self.assertEqual(str(cm.exception), f"Limits are not supported by the `{engine}` engine.")
+
+    def test_timeout(self):
+        self.assertEqual(run_batch(["print 1; while true {}", "print 2;"] * 2, workers=2, timeout=0.1),
+                         [Result([1], "Timed out."), Result([2])] * 2)
+        self.assertEqual(run_one("print 2;", timeout=0.1), Result([2]))
+        with ThreadPoolExecutor(1) as executor:
+            self.assertEqual(executor.submit(run_one, "print 1; while true {}", 0.1).result(), Result([1], "Timed out."))
+            self.assertEqual(executor.submit(run_batch, ["print 1; while true {}", "print 2;"], 1, 0.1).result(),
+                             [Result([1], "Timed out."), Result([2])])
+
+    def test_cli(self):
+        with tempfile.TemporaryDirectory() as directory:
+            paths = []
+            for i, source in enumerate(["print 1;", "print 1 / 0;"]):
+                paths.append(os.path.join(directory, f"{i}.ml"))
+                with open(paths[-1], "w") as file: file.write(source)
+            process = subprocess.run([sys.executable, "minilang_batch.py", "--workers", "2", *paths],
+                                     capture_output=True, text=True, cwd=os.path.dirname(__file__) or ".")
+        self.assertEqual(process.returncode, 1)
+        self.assertEqual(process.stdout.splitlines(),
+                         [f'{{"file": "{paths[0]}", "output": [1], "error": null}}',
+                          f'{{"file": "{paths[1]}", "output": [], "error": "Division by zero."}}'])
+
+if __name__ == "__main__":
+    unittest.main()
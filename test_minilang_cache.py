@@ -0,0 +1,86 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import minilang
+import minilang_cache
+from minilang import Parser
+from minilang_cache import AstCache
+
+class TestAstCache(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.cache = AstCache(directory.name)
+
+    def entries(self):
+        return sorted(name for name in os.listdir(self.cache.directory))
+
+    def test_hit(self):
+        source = "var a = true; def f(x) { return x + 1; } print f(a);"
+        ast = Parser(source, cache=self.cache).parse_program()
+        self.assertEqual((self.cache.hits, self.cache.misses), (0, 1))
+        parser = Parser(source, cache=self.cache)
+        self.assertEqual(parser.scanner.values, ["$EOF"])
+        self.assertEqual(parser.parse_program(), ast)
+        self.assertIs(parser.parse_program()[1][2], True)
+        self.assertEqual(list(Parser(source, cache=self.cache).parse_statements()), ast[1:])
+        self.assertEqual((self.cache.hits, self.cache.misses), (2, 1))
+        self.assertEqual(len(self.entries()), 1)
+
+    def test_key(self):
+        self.assertNotEqual(self.cache.key("print 1;"), self.cache.key("print 1; "))
+        key = self.cache.key("print 1;")
+        with mock.patch.object(minilang_cache, "FORMAT_VERSION", minilang_cache.FORMAT_VERSION + 1):
+            self.assertNotEqual(self.cache.key("print 1;"), key)
+        with mock.patch.dict(minilang.PRECEDENCE, { "%": 5 }):
+            self.assertNotEqual(minilang_cache._grammar_version(), minilang_cache.GRAMMAR_VERSION)
+        with mock.patch.object(minilang_cache, "GRAMMAR_VERSION", "0"):
+            self.assertNotEqual(self.cache.key("print 1;"), key)
+
+    def test_default_cache(self):
+        with mock.patch.object(Parser, "cache", self.cache):
+            Parser("print 1;").parse_program()
+            self.assertEqual(Parser("print 1;").parse_program(), ["program", ["print", 1]])
+        self.assertEqual(self.cache.hits, 1)
+        Parser("print 1;").parse_program()
+        self.assertEqual(self.cache.hits, 1)
+
+    def test_reparse(self):
+        for _ in range(2):
+            parser = Parser("print 1;", cache=self.cache)
+            self.assertEqual([parser.parse_program(), parser.parse_program()], [["program", ["print", 1]]] * 2)
+        parser = Parser("print 2; print 3;", cache=self.cache)
+        next(parser.parse_statements())
+        self.assertEqual(parser.parse_program(), ["program", ["print", 3]])
+        self.assertEqual(Parser("print 2; print 3;", cache=self.cache).parse_program(),
+                         ["program", ["print", 2], ["print", 3]])
+        self.assertEqual(self.cache.hits, 1)
+
+    def test_errors_are_not_cached(self):
+        with self.assertRaises(AssertionError): Parser("print 1", cache=self.cache).parse_program()
+        self.assertEqual(self.entries(), [])
+
+    def test_corrupt_entry(self):
+        Parser("print 1;", cache=self.cache).parse_program()
+        [name] = self.entries()
+        with open(os.path.join(self.cache.directory, name), "wb") as file: file.write(b"\xff")
+        self.assertEqual(Parser("print 1;", cache=self.cache).parse_program(), ["program", ["print", 1]])
+        self.assertEqual(self.cache.hits, 0)
+        self.assertEqual(Parser("print 1;", cache=self.cache).parse_program(), ["program", ["print", 1]])
+        self.assertEqual(self.cache.hits, 1)
+
+    def test_lru_eviction(self):
+        sources = [f"print {n};" for n in range(3)]
+        Parser(sources[0], cache=self.cache).parse_program()
+        self.cache.max_bytes = 2 * os.path.getsize(os.path.join(self.cache.directory, self.entries()[0]))
+        Parser(sources[1], cache=self.cache).parse_program()
+        os.utime(os.path.join(self.cache.directory, self.cache.key(sources[1]) + ".mlc"), (0, 0))
+        Parser(sources[2], cache=self.cache).parse_program()
+        self.assertEqual(self.entries(), sorted(self.cache.key(s) + ".mlc" for s in (sources[0], sources[2])))
+        self.cache.clear()
+        self.assertEqual(self.entries(), [])
+
+if __name__ == "__main__":
+    unittest.main()
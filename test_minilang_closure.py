@@ -0,0 +1,86 @@
+import contextlib
+import io
+import unittest
+from unittest import mock
+
+import test_minilang
+from minilang import ARRAY_BUILTINS, Parser
+from minilang_closure import ClosureEvaluator
+
+def get_output(source):
+    evaluator = ClosureEvaluator()
+    evaluator.eval_program(Parser(source).parse_program())
+    return evaluator.output
+
+class TestClosureEvaluator(test_minilang.TestMinilang):
+    def setUp(self):
+        patcher = mock.patch.object(test_minilang, "Evaluator", ClosureEvaluator)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_globals_persist_across_programs(self):
+        evaluator = ClosureEvaluator()
+        evaluator.eval_program(Parser("def twice(a) { return a * 2; }").parse_program())
+        evaluator.eval_program(Parser("print twice(21);").parse_program())
+        self.assertEqual(evaluator.output, [42])
+
+    def test_global_env_restored_after_error(self):
+        evaluator = ClosureEvaluator()
+        with self.assertRaises(AssertionError):
+            evaluator.eval_program(Parser("{ var a = 1; less(a, 2); print b; }").parse_program())
+        evaluator.eval_program(Parser("var a = 2; print a;").parse_program())
+        self.assertEqual(evaluator.output, [2])
+
+    def test_local_forward_reference(self):
+        self.assertEqual(get_output("""
+                                    {
+                                        var is_even = func(a) { if a = 0 { return true; } return is_odd(a - 1); };
+                                        var is_odd = func(a) { if a = 0 { return false; } return is_even(a - 1); };
+                                        print is_even(10);
+                                    }
+                                    """), ["true"])
+        self.assertEqual(test_minilang.get_error("""
+                                                 {
+                                                     var f = func() { return g; };
+                                                     f();
+                                                     var g = 1;
+                                                 }
+                                                 """), "`g` not defined.")
+
+    def test_missing_argument(self):
+        self.assertEqual(get_output("print func(a, b) { return a; }(1);"), [1])
+        self.assertEqual(test_minilang.get_error("func(a, b) { return b; }(1);"), "`b` not defined.")
+        self.assertEqual(test_minilang.get_error("func(a, b) { return func() { return a + b; }; }(1)();"),
+                         "`b` not defined.")
+        self.assertEqual(test_minilang.get_error("def f(a, b) { set b = 2; return a + b; } f(1, 5); f(1);"),
+                         "`b` not defined.")
+        self.assertEqual(get_output("print func(a) { return a; }(1, 2);"), [1])
+
+    def test_deep_recursion(self):
+        source = "def f(n) { if n = 0 { return 0; } return f(n - 1) + 1; } print f(100000);"
+        self.assertEqual(test_minilang.get_error(source), "Call depth limit exceeded.")
+        evaluator = ClosureEvaluator()
+        with self.assertRaises(AssertionError): evaluator.eval_program(Parser(source).parse_program())
+        self.assertEqual(list(evaluator.eval_statements(Parser("print f(10);").parse_statements())), [10])
+
+    def test_print_env(self):
+        stdout = io.StringIO()
+        with contextlib.redirect_stdout(stdout):
+            get_output("var a = 1; { var b = 2; func(c) { var d = 4; print_env(); }(3); }")
+        builtins = ", ".join(f"'{name}': '<builtin>'" for name in ("less", "print_env", "pmap", *ARRAY_BUILTINS))
+        self.assertEqual(stdout.getvalue().splitlines(), [f"{{{builtins}, 'a': 1}}", "{'c': 3, 'd': 4}"])
+
+    def test_closures_capture_only_free_variables(self):
+        evaluator = ClosureEvaluator()
+        evaluator.eval_program(Parser("""
+                                      def make(n) { var unused = 2 ^ 100; var count = 0;
+                                                    return func() { set count = count + n; return count; }; }
+                                      var c = make(5);
+                                      c(); print c();
+                                      """).parse_program())
+        self.assertEqual(evaluator.output, [10])
+        cells = evaluator._env.get("c").env
+        self.assertEqual([cell.value for cell in cells], [10, 5])
+
+if __name__ == "__main__":
+    unittest.main()
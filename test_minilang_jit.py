@@ -0,0 +1,81 @@
+import unittest
+from unittest import mock
+
+import test_minilang
+from minilang import Parser, Evaluator
+from minilang_jit import Jit
+
+class JitEvaluator(Evaluator):
+    def __init__(self):
+        super().__init__()
+        self.jit = Jit(self, 1)
+
+def run(source, threshold=1):
+    evaluator = Evaluator()
+    jit = Jit(evaluator, threshold)
+    evaluator.eval_program(Parser(source).parse_program())
+    return evaluator, jit
+
+class TestJit(test_minilang.TestMinilang):
+    def setUp(self):
+        patcher = mock.patch.object(test_minilang, "Evaluator", JitEvaluator)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_hot_function_is_compiled(self):
+        evaluator, jit = run("""
+                             def fib(n) { if less(n, 2) { return n; } return fib(n - 1) + fib(n - 2); }
+                             print fib(20);
+                             """, threshold=10)
+        self.assertEqual(evaluator.output, [6765])
+        self.assertEqual(jit.stats(), { "compiled": 1, "rejected": 0 })
+        self.assertIn("is LESS", jit.source(evaluator._env.get("fib")))
+
+    def test_cold_function_is_interpreted(self):
+        evaluator, jit = run("def f(n) { return n; } print f(1);", threshold=2)
+        self.assertEqual(evaluator.output, [1])
+        self.assertIsNone(jit.source(evaluator._env.get("f")))
+
+    def test_locals_and_scopes(self):
+        evaluator, jit = run("""
+                             var a = 1;
+                             def f(n) {
+                                 var s = 0;
+                                 while n # 0 { var i = n; set s = s + i * a; set n = n - 1; }
+                                 { print a; var a = 10; print a; }
+                                 set a = a + 1;
+                                 return s;
+                             }
+                             print f(4); print f(4); print a;
+                             """)
+        self.assertEqual(evaluator.output, [1, 10, 10, 2, 10, 20, 3])
+        self.assertEqual(jit.stats(), { "compiled": 1, "rejected": 0 })
+
+    def test_fallback(self):
+        evaluator, jit = run("""
+                             def adder(n) { return func(m) { return n + m; }; }
+                             def f(a, a) { return a; }
+                             def g() { print_env(); }
+                             print adder(1)(2);
+                             """)
+        self.assertEqual(evaluator.output, [3])
+        for name in ("adder", "f", "g"):
+            self.assertIsNone(jit.source(evaluator._env.get(name)))
+        evaluator, jit = run("def f(a, b) { return b; } print f(1, 2, 3);")
+        self.assertEqual(evaluator.output, [2])
+
+    def test_shadowed_less(self):
+        evaluator, jit = run("""
+                             def f(a, b) { var r = less(a, b); return r; }
+                             print f(1, 2);
+                             set less = func(a, b) { return a = b; };
+                             print f(1, 2); print f(2, 2);
+                             """)
+        self.assertEqual(evaluator.output, ["true", "false", "true"])
+
+    def test_limits_rejected(self):
+        with self.assertRaises(AssertionError) as cm: Jit(Evaluator(max_steps=10))
+        self.assertEqual(str(cm.exception), "JIT cannot be combined with limits.")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+import gc
+import unittest
+from unittest import mock
+
+import minilang_memo
+from minilang import Parser, Evaluator
+from minilang_memo import Memoizer
+
+def run(source, size=128):
+    evaluator = Evaluator()
+    memoizer = Memoizer(evaluator, size)
+    evaluator.eval_program(Parser(source).parse_program())
+    return evaluator.output, memoizer
+
+class TestMemoizer(unittest.TestCase):
+    def test_pure_recursion(self):
+        output, memoizer = run("def fib(n) { if less(n, 2) { return n; } return fib(n - 1) + fib(n - 2); } print fib(60);")
+        self.assertEqual(output, [1548008755920])
+        self.assertEqual(memoizer.stats("fib"), { "hits": 58, "misses": 61, "size": 61 })
+
+    def test_lru_size(self):
+        _, memoizer = run("def sq(n) { return n * n; } sq(1); sq(2); sq(3); sq(1);", size=2)
+        self.assertEqual(memoizer.stats("sq"), { "hits": 0, "misses": 4, "size": 2 })
+        _, memoizer = run("def sq(n) { return n * n; } sq(1); sq(2); sq(2); sq(1);", size=2)
+        self.assertEqual(memoizer.stats("sq"), { "hits": 2, "misses": 2, "size": 2 })
+
+    def test_bounded_functions(self):
+        with mock.patch.object(minilang_memo, "MAX_FUNCTIONS", 10):
+            output, memoizer = run("""
+                                   def fib(n) { if n < 2 { return n; } return fib(n - 1) + fib(n - 2); }
+                                   var i = 0;
+                                   while i # 50 {
+                                       var c = memo(func(x) { print x; return x + 1; });
+                                       c(i);
+                                       print fib(20);
+                                       set i = i + 1;
+                                   }
+                                   """)
+        self.assertEqual(output[-2:], [49, 6765])
+        self.assertEqual(len(memoizer._memos), 10)
+        self.assertEqual(memoizer.stats("fib")["misses"], 21)
+        gc.collect()
+        self.assertLessEqual(set(memoizer._forced), set(memoizer._memos))
+
+    def test_impure_functions(self):
+        for source in ["def f(n) { print n; return n; }",
+                       "var c = 0; def f(n) { set c = c + 1; return n; }",
+                       "def g(n) { print n; return n; } def f(n) { return g(n); }",
+                       "def f(n) { print_env(); return n; }",
+                       "def f(n) { return func() { return n; }; }",
+                       "def f(n) { var g = less; return g(n, 2); }"]:
+            _, memoizer = run(source + " f(1); f(1);")
+            self.assertIsNone(memoizer.stats("f"), source)
+        self.assertEqual(run("var c = 0; def f(n) { set c = c + 1; return c; } print f(1); print f(1);")[0], [1, 2])
+
+    def test_pure_functions(self):
+        for source in ["def f(n) { var a = n; { var b = a; set b = b + 1; set a = b; } return a; }",
+                       "def g(n) { return n + 1; } def f(n) { return g(n) * 2; }",
+                       "var k = 2; def f(n) { while less(n, 10) { set n = n + k; } return n; }"]:
+            output, memoizer = run(source + " print f(1); print f(1);")
+            self.assertEqual(output[0], output[1], source)
+            self.assertEqual(memoizer.stats("f")["hits"], 1, source)
+
+    def test_dependencies_are_checked(self):
+        self.assertEqual(run("var k = 1; def f(n) { return n + k; } print f(1); set k = 2; print f(1);")[0], [2, 3])
+        self.assertEqual(run("""
+                             def g(n) { return n; } def f(n) { return g(n); }
+                             print f(1); set g = func(n) { return n + 1; }; print f(1);
+                             """)[0], [1, 2])
+        self.assertEqual(run("""
+                             var k = 1; def g(x) { return x + k; } def f(x) { return g(x); }
+                             print f(1); set k = 10; print f(1);
+                             """)[0], [2, 11])
+
+    def test_typed_keys(self):
+        self.assertEqual(run("def id(n) { return n; } print id(1); print id(true);")[0], [1, "true"])
+
+    def test_arrays(self):
+        for source in ["var a = [1]; def f(n) { return a[0] + n; }",
+                       "def f(n) { return [n]; }",
+                       "var a = [1]; def f(n) { set a[0] = n; return n; }",
+                       "var a = [1]; var b = [1]; def f(n) { return a = b; }"]:
+            _, memoizer = run(source + " f(1); f(1);")
+            self.assertIsNone(memoizer.stats("f"), source)
+        output, memoizer = run("""
+                               def f(a) { return a; } memo(f);
+                               var a = [1]; print f(a); set a[0] = 2; print f(a); print f(1); print f(1);
+                               """)
+        self.assertEqual(output, ["[1]", "[2]", 1, 1])
+        self.assertEqual(memoizer.stats("f"), { "hits": 1, "misses": 1, "size": 1 })
+        output, _ = run("var a = [1]; var b = [1]; def f(n) { return a = b; } print f(0); set a[0] = 2; print f(0);")
+        self.assertEqual(output, ["true", "false"])
+
+    def test_builtins(self):
+        output, memoizer = run("def f(n) { print n; return n; } memo(f); f(1); f(1); memo_stats(f);")
+        self.assertEqual(output, [1])
+        self.assertEqual(memoizer.stats("f"), { "hits": 1, "misses": 1, "size": 1 })
+        _, memoizer = run("def sq(n) { return n * n; } nomemo(sq); sq(1); sq(1);")
+        self.assertIsNone(memoizer.stats("sq"))
+        with self.assertRaises(AssertionError) as cm: run("memo(1);")
+        self.assertEqual(str(cm.exception), "`1` is not a function.")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+import unittest
+
+from minilang import Parser, Evaluator
+from minilang_closure import ClosureEvaluator
+from minilang_optimizer import Optimizer
+from minilang_vm import VM
+
+def optimize(source):
+    optimizer = Optimizer()
+    return optimizer.optimize(Parser(source).parse_program()), optimizer.stats
+
+def get_outputs(source):
+    outputs = []
+    for engine in (Evaluator, ClosureEvaluator, VM):
+        evaluator = engine()
+        try: evaluator.eval_program(optimize(source)[0])
+        except AssertionError as e: outputs.append(str(e))
+        else: outputs.append(evaluator.output)
+    return outputs
+
+class TestOptimizer(unittest.TestCase):
+    def test_fold(self):
+        self.assertEqual(optimize("print 2 ^ 10 * 3; print 7 / 2 - 1 = 2; print true + 1;"),
+                         (["program", ["print", 3072], ["print", True], ["print", 2]],
+                          { "folded": 6, "pruned_branches": 0, "removed_loops": 0, "elided_scopes": 0 }))
+        self.assertEqual(optimize("print a + 1 * 2;")[0], ["program", ["print", ["+", "a", 2]]])
+        self.assertEqual(optimize("print f(1 + 1);")[0], ["program", ["print", ["f", 2]]])
+        self.assertEqual(optimize("print 1 < 2 and a; print 0 and a; print 2 >= 3 or a <= 1 + 1;")[0],
+                         ["program", ["print", "a"], ["print", 0], ["print", ["<=", "a", 2]]])
+
+    def test_runtime_errors_are_kept(self):
+        self.assertEqual(optimize("print 1 / (1 - 1);")[0], ["program", ["print", ["/", 1, 0]]])
+        self.assertEqual(optimize("print 2 ^ (0 - 1);")[0], ["program", ["print", ["^", 2, -1]]])
+        self.assertEqual(optimize("print 2 ^ 100000;")[0], ["program", ["print", ["^", 2, 100000]]])
+        self.assertEqual(optimize("print 1 ^ 100000;")[0], ["program", ["print", 1]])
+        self.assertEqual(get_outputs("print 1 / (1 - 1);"), ["Division by zero."] * 3)
+
+    def test_prune(self):
+        self.assertEqual(optimize("if 1 = 1 { print 1; } else { print 2; }"),
+                         (["program", ["print", 1]],
+                          { "folded": 1, "pruned_branches": 1, "removed_loops": 0, "elided_scopes": 1 }))
+        self.assertEqual(optimize("if false { print 1; } elif a { print 2; }")[0],
+                         ["program", ["if", "a", ["seq", ["print", 2]], ["seq"]]])
+        self.assertEqual(optimize("if true { var a = 1; }")[0], ["program", ["block", ["var", "a", 1]]])
+        self.assertEqual(optimize("while 1 # 1 { print 1; } print 2;"),
+                         (["program", ["print", 2]],
+                          { "folded": 1, "pruned_branches": 0, "removed_loops": 1, "elided_scopes": 0 }))
+
+    def test_elide_scopes(self):
+        self.assertEqual(optimize("{ print 1; { var a = 1; { } } } def f(a) { return a; }"),
+                         (["program", ["print", 1], ["block", ["var", "a", 1]],
+                           ["var", "f", ["func", ["a"], ["seq", ["return", "a"]]]]],
+                          { "folded": 0, "pruned_branches": 0, "removed_loops": 0, "elided_scopes": 3 }))
+
+    def test_engines(self):
+        source = """
+                 var a = 2 ^ 3;
+                 if true { var a = 1; print a; }
+                 { set a = a + 1; print a; }
+                 def f(n) { if n = 0 { return 0; } { return f(n - 1) + 1; } }
+                 while a # 10 { { set a = a + 1; } }
+                 print f(a) * (1 + 1);
+                 if false {} else { return 5; }
+                 print 1;
+                 """
+        self.assertEqual(get_outputs(source), [[1, 9, 20]] * 3)
+
+    def test_int_bits(self):
+        optimizer = Optimizer(64)
+        program = optimizer.optimize(Parser("print 2 ^ 62 * 2; print 2 ^ 100; print 2 ^ 62 * 4;").parse_program())
+        self.assertEqual(program, ["program", ["print", 2 ** 63], ["print", ["^", 2, 100]],
+                                   ["print", ["*", 2 ** 62, 4]]])
+        evaluator = Evaluator(max_int_bits=64)
+        with self.assertRaises(AssertionError) as cm: evaluator.eval_program(program)
+        self.assertEqual(str(cm.exception), "Integer size limit exceeded.")
+        self.assertEqual(evaluator.output, [2 ** 63])
+
+    def test_stream(self):
+        optimizer = Optimizer()
+        statements = optimizer.optimize_statements(Parser("{ print 1 + 1; } var a = 1; print a;").parse_statements())
+        self.assertEqual(list(Evaluator().eval_statements(statements)), [2, 1])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,54 @@
+import unittest
+
+from minilang import Evaluator, Parser
+from minilang_closure import ClosureEvaluator
+from minilang_vm import VM
+
+PROGRAM = """
+def square(a) { return a * a; }
+var offset = 3;
+var squares = pmap(func(i) { return square(i) + offset; }, 50);
+print squares[0]; print squares[7]; print squares[49]; print array_len(squares);
+print pmap(func(i) { return i = 1; }, 3);
+"""
+
+def get_output(engine, source):
+    evaluator = engine()
+    evaluator.eval_program(Parser(source).parse_program())
+    return evaluator.output
+
+def get_error(engine, source):
+    try: get_output(engine, source)
+    except AssertionError as e: return str(e)
+
+class TestParallel(unittest.TestCase):
+    def test_pmap(self):
+        for engine in (Evaluator, VM):
+            self.assertEqual(get_output(engine, PROGRAM), [3, 52, 2404, 50, "[0, 1, 0]"])
+            self.assertEqual(get_output(engine, "var none = pmap(func(i) { return i; }, 0); print 1;"), [1])
+
+    def test_errors(self):
+        self.assertEqual(get_error(Evaluator, "pmap(func(i) { return i; }, 2)[2];"), "Index `2` out of range.")
+        self.assertEqual(get_error(Evaluator, "pmap(less, 2);"), "`pmap` expects a function.")
+        self.assertEqual(get_error(Evaluator, "pmap(func(i) { return i; }, 0 - 1);"),
+                         "`pmap` expects a non-negative count.")
+        self.assertEqual(get_error(Evaluator, "pmap(func(i) { return func() { return i; }; }, 1);"),
+                         "Array elements must be 64-bit integers.")
+        for engine in (Evaluator, VM):
+            for source in ["print i;", "set offset = i;", "set a[0] = i;", "return f(i);", "return g(i);",
+                           "var h = func() { print 1; }; h();"]:
+                program = f"var a = [0]; var offset = 0; def f(n) {{ print n; }} def g(n) {{ return f(n); }}" \
+                          f"var squares = pmap(func(i) {{ {source} }}, 2);"
+                self.assertEqual(get_error(engine, program), "`pmap` expects a pure function.", source)
+            self.assertEqual(get_error(engine, "pmap(func(i) { array_fill([0], i); }, 2);"),
+                             "`pmap` cannot call the builtin `array_fill`.")
+            self.assertEqual(get_output(engine, "var a = [5, 6]; print pmap(func(i) { var b = [i]; "
+                                                "return array_sum(array_slice(a, i, 2)) + b[0]; }, 2);"),
+                             ["[11, 7]"])
+        self.assertEqual(get_error(ClosureEvaluator, "pmap(func(i) { return i; }, 1);"),
+                         "`pmap` is not supported by the closure engine.")
+        self.assertEqual(get_error(lambda: Evaluator(max_steps=100), "pmap(func(i) { return i; }, 1);"),
+                         "`pmap` cannot be combined with limits.")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+import unittest
+
+from minilang import Parser, Evaluator, compact
+from minilang_optimizer import Optimizer
+from minilang_profiler import Profiler
+
+def profile(source, optimize=False):
+    evaluator = Evaluator()
+    program = Parser(source, track_positions=True).parse_program()
+    if optimize: program = Optimizer().optimize(program)
+    with Profiler(evaluator) as profiler:
+        evaluator.eval_program(compact(program))
+    return evaluator, profiler
+
+class TestProfiler(unittest.TestCase):
+    def test_function_stats(self):
+        evaluator, profiler = profile("""
+                                      def fib(n) { if less(n, 2) { return n; } return fib(n - 1) + fib(n - 2); }
+                                      print fib(10);
+                                      print func(x) { return x; }(1);
+                                      """)
+        self.assertEqual(evaluator.output, [55, 1])
+        self.assertEqual(sorted(profiler.functions), ["<func 4:53>", "fib"])
+        fib = profiler.functions["fib"]
+        self.assertEqual(fib.calls, 177)
+        self.assertGreaterEqual(fib.inclusive, fib.exclusive * 0.999)
+        self.assertLess(fib.inclusive, sum(profiler.stacks.values()) * 1.001)
+        self.assertEqual(profiler.functions["<func 4:53>"].calls, 1)
+
+    def test_statement_hits(self):
+        _, profiler = profile("var i = 0;\nwhile i # 3 {\n  set i = i + 1;\n}\nprint i;")
+        self.assertEqual(profiler.statement_hits(), { (1, 1): 1, (2, 1): 1, (2, 13): 3, (3, 3): 3, (5, 1): 1 })
+        self.assertIn("3:3", profiler.table())
+
+    def test_optimized_positions(self):
+        source = "var x = 0;\n" + "set x = x + 2 * 3;\n" * 3000 + "if 1 = 1 {\n  print x;\n}\n{ print 1 + 1; }"
+        evaluator, profiler = profile(source, optimize=True)
+        self.assertEqual(evaluator.output, [18000, 2])
+        hits = { (line, 1): 1 for line in range(1, 3002) }
+        self.assertEqual(profiler.statement_hits(), { **hits, (3003, 3): 1, (3005, 3): 1 })
+
+    def test_collapsed(self):
+        _, profiler = profile("def f(n) { return g(n) + 1; } def g(n) { return n; } print f(1); print g(2);")
+        stacks = [line.rsplit(" ", 1)[0] for line in profiler.collapsed().split("\n")]
+        self.assertEqual(stacks, ["<main>;f", "<main>;f;g", "<main>;g"])
+
+    def test_tail_calls_replace_frames(self):
+        _, profiler = profile("def f(n) { if n = 0 { return 0; } return f(n - 1); } print f(5);")
+        self.assertEqual(profiler.functions["f"].calls, 6)
+        self.assertEqual(list(profiler.stacks), [("f",)])
+
+    def test_stop(self):
+        evaluator, profiler = profile("def f() {} f();")
+        evaluator.eval_program(Parser("f(); f();").parse_program())
+        self.assertEqual(profiler.functions["f"].calls, 1)
+        self.assertNotIn("_invoke", vars(evaluator))
+
+if __name__ == "__main__":
+    unittest.main()
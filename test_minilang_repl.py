@@ -0,0 +1,49 @@
+import io
+import unittest
+
+from minilang import Evaluator
+from minilang_repl import Repl, split_statements
+
+def session(*lines, **options):
+    out = io.StringIO()
+    repl = Repl(Evaluator(), out=out, **options)
+    for line in lines: repl.feed(line)
+    return repl, out.getvalue().splitlines()
+
+class TestRepl(unittest.TestCase):
+    def test_split_statements(self):
+        self.assertEqual(split_statements("print 1; print 2;\n"), (["print 1;", "print 2;"], ""))
+        self.assertEqual(split_statements("print 1; def f(a) {\n"), (["print 1;"], "def f(a) {\n"))
+        self.assertEqual(split_statements("var f = func() { return 1; }; f()"), (["var f = func() { return 1; };"], "f()"))
+        self.assertEqual(split_statements("while false { } { print 1; }"), (["while false { }", "{ print 1; }"], ""))
+        self.assertEqual(split_statements("if true { } else { } print 1;"), (["if true { } else { }", "print 1;"], ""))
+        self.assertEqual(split_statements("if true { }\n"), ([], "if true { }\n"))
+        self.assertEqual(split_statements("if true { }\n", final=True), (["if true { }"], ""))
+
+    def test_incremental_input(self):
+        _, lines = session("def f(a) {", "  return a * 2;", "}", "print f(1); print f(2); print", " f(3);", echo_ast=False)
+        self.assertEqual(lines, ["2", "4", "6"])
+        _, lines = session("if false { print 1; }", "elif true { print 2; }", "else { print 3; }", "", echo_ast=False)
+        self.assertEqual(lines, ["2"])
+        _, lines = session("if true { print 1; }", "print 2;", echo_ast=False)
+        self.assertEqual(lines, ["1", "2"])
+
+    def test_echo_and_cache(self):
+        repl, lines = session("var a = 1;", "print a;", ":ast", "print a;")
+        self.assertEqual(lines, ["['var', 'a', 1]", "['print', 'a']", "1", "ast: off", "1"])
+        self.assertEqual(repl.parse.cache_info().hits, 1)
+
+    def test_time_and_mem(self):
+        _, lines = session(":time", ":mem", "print 1;", ":time", ":mem", ":gc", echo_ast=False)
+        self.assertEqual(lines[:2], ["time: on", "mem: on"])
+        self.assertEqual(lines[2], "1")
+        self.assertRegex(lines[3], r"^time: \d+\.\d{3} ms$")
+        self.assertRegex(lines[4], r"^mem: peak \d+\.\d KiB$")
+        self.assertEqual(lines[5:], ["time: off", "mem: off", "Unknown command `:gc`."])
+
+    def test_errors(self):
+        _, lines = session("print 1; print b; print 2;", "print 3 4;", "print 5;", echo_ast=False)
+        self.assertEqual(lines, ["1", "Error: `b` not defined.", "Error at line 1, column 9: Expected `;`, found `4`.", "5"])
+
+if __name__ == "__main__":
+    unittest.main()
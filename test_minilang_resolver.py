@@ -0,0 +1,80 @@
+import unittest
+
+from minilang import Parser
+from minilang_resolver import Resolver
+
+def resolve(source, global_names=("less", "print_env")):
+    return Resolver(global_names).resolve(Parser(source).parse_program())
+
+def get_error(source):
+    try: resolved = resolve(source)
+    except AssertionError as e: return str(e)
+    else: return f"Error not occurred. resolved={resolved}"
+
+class TestResolver(unittest.TestCase):
+    def test_globals_stay_names(self):
+        self.assertEqual(resolve("var a = 1; set a = a + 1; print less(a, 2);"),
+                         ["program", ["var", "a", 1], ["set", "a", ["+", "a", 1]],
+                          ["print", ["call", "less", "a", 2]]])
+
+    def test_block_slots(self):
+        self.assertEqual(resolve("{ var a = 1; var b = a; { set b = a; } }"),
+                         ["program", ["scope", ["a", "b"], [],
+                                      ["define", 2, 1], ["define", 3, ["local", 0, 2]],
+                                      ["seq", ["assign", 0, 3, ["local", 0, 2]]]]])
+        self.assertEqual(resolve("{ var a = 1; { var b = a; } }"),
+                         ["program", ["scope", ["a"], [], ["define", 2, 1],
+                                      ["scope", ["b"], [], ["define", 2, ["local", 1, 2]]]]])
+
+    def test_function_frame(self):
+        self.assertEqual(resolve("def f(a) { var b = a; return b; }"),
+                         ["program", ["var", "f", ["func", ["a"], ["a", "b"], [], [],
+                                                   ["seq", ["define", 3, ["local", 0, 2]],
+                                                           ["return", ["local", 0, 3]]]]]])
+        self.assertEqual(resolve("def f(a) { var a = 1; }"),
+                         ["program", ["var", "f", ["func", ["a"], ["a"], [], [],
+                                                   ["scope", ["a"], [], ["define", 2, 1]]]]])
+
+    def test_shadowing_follows_definition_order(self):
+        self.assertEqual(resolve("var a = 1; { print a; var a = 2; print a; }"),
+                         ["program", ["var", "a", 1],
+                          ["scope", ["a"], [], ["print", "a"], ["define", 2, 2], ["print", ["local", 0, 2]]]])
+
+    def test_later_definitions_are_checked(self):
+        self.assertEqual(resolve("{ var f = func() { return g(); }; var g = func() { return 1; }; }"),
+                         ["program", ["scope", ["f", "g"], [3],
+                                      ["define", 2, ["func", [], [], [], [["cell", 0, 3]],
+                                                     ["seq", ["return", ["call", ["checked_free", 0, 0, "g"]]]]]],
+                                      ["cell_define", 3, ["func", [], [], [], [], ["seq", ["return", 1]]]]]])
+
+    def test_seq_declares_in_enclosing_scope(self):
+        self.assertEqual(Resolver().resolve(["program", ["seq", ["var", "a", 1]], ["print", "a"]]),
+                         ["program", ["seq", ["var", "a", 1]], ["print", "a"]])
+        self.assertEqual(Resolver().resolve(["program", ["block", ["seq", ["var", "a", 1]], ["print", "a"]]]),
+                         ["program", ["scope", ["a"], [], ["seq", ["define", 2, 1]], ["print", ["local", 0, 2]]]])
+
+    def test_captured_variables_become_cells(self):
+        self.assertEqual(resolve("def f(a, b) { return func() { set a = a + 1; return a; }; }"),
+                         ["program", ["var", "f", ["func", ["a", "b"], ["a", "b"], [2], [],
+                                                   ["seq", ["return", ["func", [], [], [], [["cell", 0, 2]],
+                                                                       ["seq", ["free_assign", 0, 0, ["+", ["free", 0, 0], 1]],
+                                                                               ["return", ["free", 0, 0]]]]]]]]])
+
+    def test_free_variables_pass_through_functions(self):
+        self.assertEqual(resolve("{ var x = 1; var f = func() { return func() { { var y = x; } }; }; }"),
+                         ["program", ["scope", ["x", "f"], [2], ["cell_define", 2, 1],
+                                      ["define", 3, ["func", [], [], [], [["cell", 0, 2]],
+                                                     ["seq", ["return", ["func", [], [], [], [["free", 0, 0]],
+                                                                         ["seq", ["scope", ["y"], [],
+                                                                                  ["define", 2, ["free", 1, 0]]]]]]]]]]])
+
+    def test_errors_at_resolve_time(self):
+        self.assertEqual(get_error("if false { print a; }"), "`a` not defined.")
+        self.assertEqual(get_error("def f() { set b = 1; }"), "`b` not defined.")
+        self.assertEqual(get_error("print 1; var a = 1; var a = 2;"), "`a` already defined.")
+        self.assertEqual(get_error("var less = 1;"), "`less` already defined.")
+        self.assertEqual(get_error("if false { var a = 1; var a = 2; }"), "`a` already defined.")
+        self.assertEqual(get_error("def f(a, a) {}"), "`a` already defined.")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+import io
+import threading
+import unittest
+
+from minilang import Parser, Evaluator
+from minilang_closure import ClosureEvaluator
+from minilang_sinks import CallbackSink, QueueSink, WriterSink
+from minilang_vm import VM
+
+SOURCE = "var i = 0; while i # 5 { print i; set i = i + 1; } print func() {}; print less;"
+OUTPUT = [0, 1, 2, 3, 4, "<func>", "<builtin>"]
+
+class CountingWriter(io.StringIO):
+    def __init__(self):
+        super().__init__()
+        self.writes = 0
+
+    def write(self, s):
+        self.writes += 1
+        return super().write(s)
+
+class TestSinks(unittest.TestCase):
+    def test_list_is_default(self):
+        for engine in (Evaluator, ClosureEvaluator, VM):
+            evaluator = engine()
+            evaluator.eval_program(Parser(SOURCE).parse_program())
+            self.assertEqual(evaluator.output, OUTPUT)
+
+    def test_callback(self):
+        for engine in (Evaluator, ClosureEvaluator, VM):
+            values = []
+            evaluator = engine(sink=CallbackSink(values.append))
+            evaluator.eval_program(Parser(SOURCE).parse_program())
+            self.assertEqual(values, OUTPUT)
+
+    def test_writer_buffers(self):
+        file = CountingWriter()
+        Evaluator(sink=WriterSink(file, 3)).eval_program(Parser(SOURCE).parse_program())
+        self.assertEqual(file.getvalue(), "".join(f"{value}\n" for value in OUTPUT))
+        self.assertEqual(file.writes, 3)
+
+    def test_writer_flushes_on_error(self):
+        for engine in (Evaluator, ClosureEvaluator, VM):
+            file = io.StringIO()
+            evaluator = engine(sink=WriterSink(file))
+            with self.assertRaises(AssertionError):
+                evaluator.eval_program(Parser("print 1; print 2; print 1 / 0;").parse_program())
+            self.assertEqual(file.getvalue(), "1\n2\n")
+
+    def test_statements_with_sink(self):
+        for engine in (Evaluator, ClosureEvaluator, VM):
+            file = io.StringIO()
+            evaluator = engine(sink=WriterSink(file))
+            self.assertEqual(list(evaluator.eval_statements(Parser(SOURCE).parse_statements())), [])
+            self.assertEqual(file.getvalue(), "".join(f"{value}\n" for value in OUTPUT))
+
+    def test_queue(self):
+        sink = QueueSink(2)
+        evaluator = Evaluator(sink=sink)
+        values = []
+        consumer = threading.Thread(target=lambda: values.extend(sink))
+        consumer.start()
+        evaluator.eval_program(Parser("var i = 0; while i # 100 { print i; set i = i + 1; }").parse_program())
+        sink.close()
+        consumer.join()
+        self.assertEqual(values, list(range(100)))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+import os
+import tempfile
+import unittest
+
+from minilang import Parser, Evaluator
+from minilang_closure import ClosureEvaluator
+from minilang_snapshot import fork, restore, save
+from minilang_vm import VM
+
+PRELUDE = """
+def cons(h, t) { return func(first) { if first { return h; } return t; }; }
+var list = 0;
+var i = 0;
+while i # 3000 { set list = cons(i, list); set i = i + 1; }
+def sum(l) { var s = 0; while l # 0 { set s = s + l(true); set l = l(false); } return s; }
+var counter = 0;
+def bump() { set counter = counter + 1; return counter; }
+var smaller = func(lt) { return func(a, b) { return lt(a, b); }; }(less);
+"""
+CHECK = "print sum(list); print bump(); print smaller(1, 2);"
+
+def run(evaluator, source):
+    evaluator.eval_program(Parser(source).parse_program())
+    return evaluator.output
+
+def get_error(evaluator, source):
+    try: run(evaluator, source)
+    except AssertionError as e: return str(e)
+
+class TestSnapshot(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "prelude.snapshot")
+
+    def test_save_and_restore(self):
+        for engine in (Evaluator, VM):
+            evaluator = engine()
+            run(evaluator, PRELUDE)
+            save(evaluator, self.path)
+            restored = restore(self.path, engine())
+            self.assertEqual(run(restored, CHECK), [4498500, 1, "true"])
+            self.assertEqual(run(restored, "print bump(); print counter;"), [2, 2])
+            self.assertIs(restored._env.get("less"), restored._env._values["less"])
+        with self.assertRaises(AssertionError) as cm: restore(self.path)
+        self.assertEqual(str(cm.exception), "Snapshot was saved from `VM`.")
+
+    def test_fork_is_independent(self):
+        evaluator = Evaluator()
+        run(evaluator, PRELUDE)
+        forked = fork(evaluator)
+        self.assertEqual(run(forked, CHECK), [4498500, 1, "true"])
+        self.assertEqual(run(forked, "set list = list(false); print sum(list); print bump();"), [4495501, 2])
+        self.assertEqual(run(evaluator, CHECK), [4498500, 1, "true"])
+        self.assertIsNot(forked._env.get("sum"), evaluator._env.get("sum"))
+        self.assertIs(forked._env.get("sum").body, evaluator._env.get("sum").body)
+
+    def test_arrays(self):
+        evaluator = Evaluator()
+        run(evaluator, "var a = array(3000); array_fill(a, 2); def total() { return array_sum(a); }")
+        save(evaluator, self.path)
+        self.assertEqual(run(restore(self.path), "print total(); print a[2999];"), [6000, 2])
+        forked = fork(evaluator)
+        run(forked, "set a[0] = 5;")
+        self.assertEqual(run(forked, "print total();"), [6003])
+        self.assertEqual(run(evaluator, "print total();"), [6000])
+
+    def test_array_slices_share_storage(self):
+        evaluator = Evaluator()
+        run(evaluator, "var a = array(4); var b = array_slice(a, 1, 3); var c = array_slice(b, 1, 2); var d = [];")
+        save(evaluator, self.path)
+        for copy in (restore(self.path), fork(evaluator)):
+            self.assertEqual(run(copy, "set b[0] = 9; set c[0] = 8; print a; print array_len(d);"), ["[0, 9, 8, 0]", 0])
+        self.assertEqual(run(evaluator, "print a;"), ["[0, 0, 0, 0]"])
+
+    def test_errors(self):
+        evaluator = Evaluator()
+        run(evaluator, "var a = 1;")
+        save(evaluator, self.path)
+        target = Evaluator()
+        run(target, "var a = 2;")
+        with self.assertRaises(AssertionError) as cm: restore(self.path, target)
+        self.assertEqual(str(cm.exception), "`a` already defined.")
+        with self.assertRaises(AssertionError) as cm: save(ClosureEvaluator(), self.path)
+        self.assertEqual(str(cm.exception), "Closure engine evaluators cannot be snapshotted.")
+        evaluator._env.define("twice", lambda a: a * 2)
+        save(evaluator, self.path)
+        self.assertEqual(run(restore(self.path), "print a;"), [1])
+        self.assertEqual(get_error(restore(self.path), "twice(1);"), "Builtin `twice` is not available.")
+
+if __name__ == "__main__":
+    unittest.main()
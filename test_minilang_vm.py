@@ -0,0 +1,49 @@
+import unittest
+from unittest import mock
+
+import test_minilang
+from minilang import Parser
+from minilang_vm import CALL, LESS, TAIL_CALL, Compiler, VM
+
+def get_output(source):
+    vm = VM()
+    vm.eval_program(Parser(source).parse_program())
+    return vm.output
+
+class TestVM(test_minilang.TestMinilang):
+    def setUp(self):
+        patcher = mock.patch.object(test_minilang, "Evaluator", VM)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_constant_and_name_tables(self):
+        code = Compiler().compile_program(Parser("var a = 1; set a = a + 1; print true;").parse_program())
+        self.assertEqual(code.consts, (1, True))
+        self.assertEqual(code.names, ("a",))
+
+    def test_deep_recursion(self):
+        self.assertEqual(get_output("""
+                                    def count(n) {
+                                        if n = 0 { return 0; }
+                                        return count(n - 1) + 1;
+                                    }
+                                    print count(20000);
+                                    """), [20000])
+
+    def test_tail_call_opcode(self):
+        code = Compiler().compile_program(Parser("def f(n) { return f(n - 1); }").parse_program())
+        func = code.consts[0].body
+        self.assertIn(TAIL_CALL, func.ops[::2])
+        self.assertNotIn(CALL, func.ops[::2])
+        self.assertEqual(get_output("print func() { return func() { return 5; }; }()();"), [5])
+        self.assertEqual(get_output("print func(f) { return f(); }(func() { return less; });"), ["<builtin>"])
+
+    def test_less_intrinsic(self):
+        code = Compiler().compile_program(Parser("def f(n) { return less(n, 2); }").parse_program())
+        self.assertIn(LESS, code.consts[0].body.ops[::2])
+        self.assertNotIn(TAIL_CALL, code.consts[0].body.ops[::2])
+        code = Compiler().compile_program(Parser("def f(less) { return less(1, 2); }").parse_program())
+        self.assertNotIn(LESS, code.consts[0].body.ops[::2])
+
+if __name__ == "__main__":
+    unittest.main()